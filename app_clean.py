@@ -8,6 +8,8 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import pickle
+import os
+from feature_transform import load_feature_transform
 
 # Page configuration
 st.set_page_config(
@@ -28,37 +30,18 @@ st.markdown("""
 
 # Configuration
 MODEL_PATH = "models/model.pkl"
-ENCODERS_PATH = "data/processed/encoders.pkl"
-
-
-def bucketize(val, cuts):
-    """Bucketize continuous value into discrete bucket."""
-    for i, c in enumerate(cuts):
-        if val <= c:
-            return i
-    return len(cuts)
-
-
-def safe_encode(encoder, value):
-    """Encode value; if unseen, snap to closest known class."""
-    try:
-        return encoder.transform([value])[0]
-    except ValueError:
-        known_classes = [int(c) for c in encoder.classes_]
-        closest = min(known_classes, key=lambda x: abs(x - value))
-        return encoder.transform([str(closest)])[0]
-
+PROCESSED_DIR = "data/processed"
 
 
 @st.cache_resource
-def load_model_and_encoders():
-    """Load trained model and encoders (cached)."""
+def load_model_and_transform():
+    """Load trained model and fitted feature transform (cached)."""
     try:
         with open(MODEL_PATH, 'rb') as f:
             model = pickle.load(f)
-        with open(ENCODERS_PATH, 'rb') as f:
-            encoders = pickle.load(f)
-        return model, encoders
+        # feature_transform.json, else older pickled artifacts
+        transform = load_feature_transform(PROCESSED_DIR)
+        return model, transform
     except FileNotFoundError:
         st.error("❌ Model files not found! Please train the model first.")
         st.stop()
@@ -75,7 +58,7 @@ def show_welcome():
     """, unsafe_allow_html=True)
 
 
-def get_user_inputs(encoders):
+def get_user_inputs(transform):
     """Get 8 inputs from user with better organization."""
     
     st.markdown("## 📝 Tell Us About Your Post")
@@ -89,7 +72,7 @@ def get_user_inputs(encoders):
         # Q1: Day
         day = st.selectbox(
             "1️⃣ What day will you post?",
-            options=encoders['day_of_week'].classes_,
+            options=transform.vocabularies['day_of_week'],
             help="Choose the day of the week (affects visibility)",
             key="day_select"
         )
@@ -97,7 +80,7 @@ def get_user_inputs(encoders):
         # Q2: Platform
         platform = st.selectbox(
             "2️⃣ Which platform?",
-            options=encoders['platform'].classes_,
+            options=transform.vocabularies['platform'],
             help="Different platforms have different engagement patterns",
             key="platform_select"
         )
@@ -105,7 +88,7 @@ def get_user_inputs(encoders):
         # Q3: Location
         location = st.selectbox(
             "3️⃣ Where are you posting from?",
-            options=encoders['location'].classes_,
+            options=transform.vocabularies['location'],
             help="Location affects engagement patterns",
             key="location_select"
         )
@@ -115,7 +98,7 @@ def get_user_inputs(encoders):
         # Q4: Topic
         topic = st.selectbox(
             "4️⃣ What's your post topic?",
-            options=encoders['topic_category'].classes_,
+            options=transform.vocabularies['topic_category'],
             help="Choose the main topic category",
             key="topic_select"
         )
@@ -126,7 +109,7 @@ def get_user_inputs(encoders):
         # Q5: Language
         language = st.selectbox(
             "5️⃣ What language is your post?",
-            options=encoders['language'].classes_,
+            options=transform.vocabularies['language'],
             help="Language affects audience reach",
             key="language_select"
         )
@@ -141,7 +124,7 @@ def get_user_inputs(encoders):
         # Q7: Emotion
         emotion = st.selectbox(
             "7️⃣ What emotion does it express?",
-            options=encoders['emotion_type'].classes_,
+            options=transform.vocabularies['emotion_type'],
             help="Primary emotion in the post",
             key="emotion_select"
         )
@@ -189,58 +172,6 @@ def get_user_inputs(encoders):
     }
 
 
-def encode_inputs(inputs, encoders):
-    """Convert user inputs to model-ready format with exact column order."""
-    
-    sentiment_bucket = bucketize(inputs['sentiment_score'], [-0.4, -0.1, 0.1, 0.4])
-    toxicity_bucket = bucketize(inputs['toxicity_score'], [0.2, 0.4, 0.6, 0.8])
-    past_perf_bucket = bucketize(inputs['user_past_sentiment_avg'], [-0.2, 0.0, 0.2, 0.5])
-    growth_bucket = bucketize(inputs['user_engagement_growth'], [-0.2, 0.0, 0.2, 0.5])
-
-    # Compute interaction features (same as training)
-    sentiment_toxicity_interaction = inputs['sentiment_score'] * inputs['toxicity_score']
-    abs_sentiment = abs(inputs['sentiment_score'])
-    perf_momentum = inputs['user_past_sentiment_avg'] * inputs['user_engagement_growth']
-    toxicity_squared = inputs['toxicity_score'] ** 2
-    sentiment_squared = inputs['sentiment_score'] ** 2
-
-    # Build dict in exact order: encoded categoricals, numericals, raw buckets, interactions
-    encoded = {
-        'day_of_week_encoded': encoders['day_of_week'].transform([inputs['day_of_week']])[0],
-        'platform_encoded': encoders['platform'].transform([inputs['platform']])[0],
-        'topic_category_encoded': encoders['topic_category'].transform([inputs['topic_category']])[0],
-        'emotion_type_encoded': encoders['emotion_type'].transform([inputs['emotion_type']])[0],
-        'location_encoded': encoders['location'].transform([inputs['location']])[0],
-        'language_encoded': encoders['language'].transform([inputs['language']])[0],
-        'sentiment_bucket_encoded': safe_encode(encoders['sentiment_bucket'], sentiment_bucket),
-        'toxicity_bucket_encoded': safe_encode(encoders['toxicity_bucket'], toxicity_bucket),
-        'past_perf_bucket_encoded': safe_encode(encoders['past_perf_bucket'], past_perf_bucket),
-        'growth_bucket_encoded': safe_encode(encoders['growth_bucket'], growth_bucket),
-        'sentiment_score': inputs['sentiment_score'],
-        'toxicity_score': inputs['toxicity_score'],
-        'user_past_sentiment_avg': inputs['user_past_sentiment_avg'],
-        'user_engagement_growth': inputs['user_engagement_growth'],
-        'sentiment_bucket': sentiment_bucket,
-        'toxicity_bucket': toxicity_bucket,
-        'past_perf_bucket': past_perf_bucket,
-        'growth_bucket': growth_bucket,
-        'sentiment_toxicity_interaction': sentiment_toxicity_interaction,
-        'abs_sentiment': abs_sentiment,
-        'perf_momentum': perf_momentum,
-        'toxicity_squared': toxicity_squared,
-        'sentiment_squared': sentiment_squared,
-    }
-    
-    # Return DataFrame with columns in exact order expected by model (23 features)
-    cols = ['day_of_week_encoded', 'platform_encoded', 'topic_category_encoded', 'emotion_type_encoded', 'location_encoded', 'language_encoded',
-            'sentiment_bucket_encoded', 'toxicity_bucket_encoded', 'past_perf_bucket_encoded', 'growth_bucket_encoded',
-            'sentiment_score', 'toxicity_score', 'user_past_sentiment_avg', 'user_engagement_growth',
-            'sentiment_bucket', 'toxicity_bucket', 'past_perf_bucket', 'growth_bucket',
-            'sentiment_toxicity_interaction', 'abs_sentiment', 'perf_momentum', 'toxicity_squared', 'sentiment_squared']
-    
-    return pd.DataFrame([encoded])[cols]
-
-
 def get_engagement_level(rate):
     """Categorize engagement rate with emojis and descriptions."""
     if rate < 0.3:
@@ -366,16 +297,16 @@ def main():
     show_welcome()
     
     # Load model
-    model, encoders = load_model_and_encoders()
+    model, transform = load_model_and_transform()
 
     st.markdown("### 🔮 Predict Engagement")
 
     # Get user inputs
-    inputs = get_user_inputs(encoders)
+    inputs = get_user_inputs(transform)
 
     if st.button("🔮 Get My Prediction", type="primary", use_container_width=True, key="predict_btn"):
 
-        X = encode_inputs(inputs, encoders)
+        X = transform.transform_one(inputs)
         prediction = model.predict(X)[0]
         prediction = np.clip(prediction, 0, 1)  # Valid range
 
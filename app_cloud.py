@@ -1,6 +1,6 @@
 """
 Cloud-Enabled Streamlit App
-Can load model from Azure Blob Storage or local file
+Can load model from Azure Blob Storage (or the STORAGE_URL backend) or local file
 """
 
 import streamlit as st
@@ -9,54 +9,40 @@ import pickle
 import os
 from datetime import datetime
 
+from blob_storage import is_azure_url, open_store
+from azure_config import STORAGE_URL, CONTAINER_MODELS, get_storage_account_key
+
 # Try to import Azure libraries
 try:
-    from azure.storage.blob import BlobServiceClient
-    from azure_config import (
-        STORAGE_ACCOUNT_NAME,
-        CONTAINER_MODELS,
-        get_storage_account_key
-    )
+    import azure.storage.blob  # noqa: F401
     AZURE_AVAILABLE = True
 except ImportError:
     AZURE_AVAILABLE = False
 
-def load_model_from_azure():
-    """Load model from Azure Blob Storage"""
-    if not AZURE_AVAILABLE:
+def load_model_from_storage():
+    """Load model from the configured storage backend (STORAGE_URL)"""
+    azure = is_azure_url(STORAGE_URL)
+    if azure and not AZURE_AVAILABLE:
         return None
     
     try:
-        print("📥 Loading model from Azure Blob Storage...")
-        
-        # Get storage account key
-        account_key = get_storage_account_key()
-        if not account_key:
-            return None
+        print(f"📥 Loading model from {STORAGE_URL}...")
         
-        # Create connection string
-        connection_string = (
-            f"DefaultEndpointsProtocol=https;"
-            f"AccountName={STORAGE_ACCOUNT_NAME};"
-            f"AccountKey={account_key};"
-            f"EndpointSuffix=core.windows.net"
-        )
+        # Azure authenticates with the storage account key
+        credential = None
+        if azure:
+            credential = get_storage_account_key()
+            if not credential:
+                return None
         
-        # Download model
-        blob_service_client = BlobServiceClient.from_connection_string(connection_string)
-        blob_client = blob_service_client.get_blob_client(
-            container=CONTAINER_MODELS,
-            blob="model.pkl"
-        )
+        store = open_store(STORAGE_URL, credential)
+        model = pickle.loads(store.get(CONTAINER_MODELS, "model.pkl"))
         
-        model_data = blob_client.download_blob().readall()
-        model = pickle.loads(model_data)
-        
-        print("✅ Model loaded from Azure")
+        print("✅ Model loaded from storage")
         return model
         
     except Exception as e:
-        print(f"⚠️  Could not load from Azure: {e}")
+        print(f"⚠️  Could not load from storage: {e}")
         return None
 
 def load_model_local():
@@ -69,12 +55,11 @@ def load_model_local():
 
 @st.cache_resource
 def load_model():
-    """Load model from Azure or local file"""
-    # Try Azure first
-    if AZURE_AVAILABLE:
-        model = load_model_from_azure()
-        if model is not None:
-            return model, "Azure Blob Storage"
+    """Load model from the storage backend or local file"""
+    # Try the storage backend first
+    model = load_model_from_storage()
+    if model is not None:
+        return model, "Azure Blob Storage" if is_azure_url(STORAGE_URL) else STORAGE_URL
     
     # Fall back to local
     model = load_model_local()
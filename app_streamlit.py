@@ -8,6 +8,9 @@ import pandas as pd
 import pickle
 import numpy as np
 import os
+from feature_transform import load_feature_transform
+from blob_storage import open_store
+from azure_config import STORAGE_URL, CONTAINER_MODELS
 
 st.set_page_config(page_title="Engagement Predictor", layout="wide")
 
@@ -19,23 +22,14 @@ This app predicts engagement rates using a Gradient Boosting model trained on so
 # Load model from Azure Blob Storage
 @st.cache_resource
 def load_model():
-    """Load model from Azure Blob Storage"""
+    """Load model from the storage backend (STORAGE_URL)"""
     try:
-        from azure.storage.blob import BlobServiceClient
-        from azure.identity import DefaultAzureCredential
-        import io
-        
-        # Try loading from Blob first
+        # Try loading from the storage backend first (Azure Blob by default)
         try:
-            credential = DefaultAzureCredential()
-            account_url = "https://stengml707.blob.core.windows.net"
-            blob_service = BlobServiceClient(account_url=account_url, credential=credential)
-            blob_client = blob_service.get_blob_client(container="models", blob="model_gb.pkl")
-            
-            model_bytes = blob_client.download_blob().readall()
-            model = pickle.loads(model_bytes)
+            store = open_store(STORAGE_URL)
+            model = pickle.loads(store.get(CONTAINER_MODELS, "model_gb.pkl"))
             
-            st.success("✅ Model loaded from Azure Blob Storage: models/model_gb.pkl")
+            st.success(f"✅ Model loaded from {STORAGE_URL}: {CONTAINER_MODELS}/model_gb.pkl")
             return model
         except:
             # Fallback to local if Blob fails
@@ -48,23 +42,25 @@ def load_model():
         return None
 
 @st.cache_resource
-def load_encoders():
-    """Load encoders"""
+def load_transform():
+    """Load fitted feature transform (JSON artifact, falls back to the pickles)"""
     try:
-        with open("data/processed/encoders.pkl", "rb") as f:
-            encoders = pickle.load(f)
-        return encoders
+        return load_feature_transform("data/processed")
     except:
-        return {}
+        return None
 
 # Load assets
 model = load_model()
-encoders = load_encoders()
+transform = load_transform()
 
 if model is None:
     st.error("Model failed to load. Please check deployment.")
     st.stop()
 
+if transform is None:
+    st.error("Feature transform failed to load. Please run preprocessing first.")
+    st.stop()
+
 # Sidebar for input
 st.sidebar.header("📝 Input Features")
 
@@ -94,31 +90,19 @@ with col2:
     st.metric("Toxicity Squared", f"{toxicity_sq:.4f}")
     st.metric("Sentiment Squared", f"{sentiment_sq:.4f}")
 
-# Create feature vector for prediction
-feature_names = [
-    'day_of_week_encoded', 'platform_encoded', 'topic_category_encoded',
-    'emotion_type_encoded', 'location_encoded', 'language_encoded',
-    'sentiment_bucket_encoded', 'toxicity_bucket_encoded',
-    'past_perf_bucket_encoded', 'growth_bucket_encoded',
-    'sentiment_score', 'toxicity_score', 'user_past_sentiment_avg',
-    'user_engagement_growth', 'sentiment_bucket', 'toxicity_bucket',
-    'past_perf_bucket', 'growth_bucket', 'sentiment_toxicity_interaction',
-    'abs_sentiment', 'perf_momentum', 'toxicity_squared', 'sentiment_squared'
-]
-
-# Sample feature vector (in real app, would be dynamic input)
-sample_vector = np.array([
-    1, 1, 2, 1, 15, 7,  # Encoded categoricals (day_of_week, platform, topic, emotion, location, language)
-    0, 0, 2, 0,  # Buckets
-    sentiment_score, toxicity_score, past_sentiment, engagement_growth,
-    0, 0, 2, 0,  # Bucket integer values
-    sentiment_interaction, abs_sentiment, perf_momentum, toxicity_sq, sentiment_sq
-])
+# Raw inputs for the shared feature transform; categorical features not
+# asked for here take the fitted defaults
+inputs = {
+    'sentiment_score': sentiment_score,
+    'toxicity_score': toxicity_score,
+    'user_past_sentiment_avg': past_sentiment,
+    'user_engagement_growth': engagement_growth,
+}
 
 # Make prediction
 if st.button("🔮 Predict Engagement Rate"):
     try:
-        prediction = model.predict([sample_vector])[0]
+        prediction = model.predict(transform.transform_one(inputs))[0]
         
         # Display prediction
         st.success(f"### Predicted Engagement Rate: **{prediction:.4f}**")
@@ -0,0 +1,231 @@
+"""
+ARROW BACKEND - Arrow-native execution of the preprocessing pipeline
+Same stages and output as feature_transform.fit_pipeline, run on pyarrow
+tables. The multi-threaded CSV reader parses categoricals straight into
+dictionary arrays and label codes are computed from the dictionary
+indices, so each string is touched once per distinct value, never per row.
+Optional: requires pyarrow.
+"""
+
+import csv
+import numpy as np
+import pandas as pd
+from feature_buckets import BUCKET_SPECS, BUCKET_COLUMNS, bucketize_array
+from feature_transform import RAW_FEATURES, NUMERICAL_COLS, CATEGORICAL_COLS, TARGET, INTERACTIONS
+from topic_categories import expand_topic_category
+from stage_cache import run_stages
+
+try:
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+    ARROW_AVAILABLE = True
+except ImportError:
+    ARROW_AVAILABLE = False
+
+
+def _require_arrow():
+    if not ARROW_AVAILABLE:
+        raise ImportError("The arrow backend requires pyarrow (pip install pyarrow)")
+
+
+def _read_header(source):
+    """Column names of a CSV path or binary buffer (the buffer is rewound)."""
+    if hasattr(source, 'seek'):
+        line = source.readline()
+        source.seek(0)
+        return next(csv.reader([line.decode('utf-8')]))
+    with open(source, newline='', encoding='utf-8') as f:
+        return next(csv.reader(f))
+
+
+def read_table(source):
+    """Read the feature spec columns of a raw CSV into an Arrow table (multi-threaded)."""
+    _require_arrow()
+    print("📂 Loading dataset (Arrow)...")
+    header = _read_header(source)
+    columns = [c for c in RAW_FEATURES + [TARGET] if c in header]
+    types = {c: pa.dictionary(pa.int32(), pa.string()) if c in CATEGORICAL_COLS else pa.float64()
+             for c in columns}
+    table = pa_csv.read_csv(
+        source,
+        read_options=pa_csv.ReadOptions(use_threads=True),
+        convert_options=pa_csv.ConvertOptions(include_columns=columns, column_types=types,
+                                              strings_can_be_null=True),
+    )
+    print(f"✅ Loaded: {table.num_rows} rows, {table.num_columns} columns")
+    return table
+
+
+def _is_categorical(table, col):
+    return pa.types.is_dictionary(table.schema.field(col).type)
+
+
+def _dictionary(table, col):
+    """(indices with nulls as -1, dictionary values) of a single-chunk dictionary column."""
+    arr = table[col].combine_chunks()
+    return arr.indices.fill_null(-1).to_numpy(zero_copy_only=False), arr.dictionary.to_pylist()
+
+
+def select_features(table):
+    """Keep only pre-posting features (zero-copy column selection)."""
+    print("\n📋 Selecting pre-posting features...")
+    features = [f for f in RAW_FEATURES + [TARGET] if f in table.column_names]
+    table = table.select(features)
+    print(f"✅ Selected {len(features)-1} features + 1 target")
+    return table
+
+
+def fit_fill_values(table):
+    """Median for numerical columns, mode (smallest value on ties) for categorical ones."""
+    fill_values = {}
+    for col in table.column_names:
+        if _is_categorical(table, col):
+            continue
+        values = table[col].drop_null().to_numpy()
+        fill_values[col] = np.median(values) if len(values) else np.nan
+    for col in table.column_names:
+        if not _is_categorical(table, col):
+            continue
+        indices, dictionary = _dictionary(table, col)
+        counts = np.bincount(indices[indices >= 0], minlength=len(dictionary))
+        if counts.any():
+            top = counts.max()
+            fill_values[col] = min(v for v, c in zip(dictionary, counts) if c == top)
+    return fill_values
+
+
+def clean_data(table):
+    """Drop rows with >30% missing, then fill numerical with median, categorical with mode."""
+    print("\n🔍 Cleaning data...")
+    present = sum(table[c].is_valid().to_numpy(zero_copy_only=False).astype(np.int64)
+                  for c in table.column_names)
+    table = table.filter(pa.array(present >= table.num_columns * 0.7))
+    # One chunk per column and one dictionary per categorical column
+    table = table.unify_dictionaries().combine_chunks()
+
+    for col, value in fit_fill_values(table).items():
+        if table[col].null_count == 0:
+            continue
+        i = table.column_names.index(col)
+        if _is_categorical(table, col):
+            arr = table[col].combine_chunks()
+            code = arr.dictionary.to_pylist().index(value)
+            filled = pa.DictionaryArray.from_arrays(arr.indices.fill_null(code), arr.dictionary)
+        else:
+            filled = table[col].fill_null(value)
+        table = table.set_column(i, col, filled)
+
+    missing = sum(table[c].null_count for c in table.column_names)
+    print(f"✅ Missing values: {missing}")
+    return table
+
+
+def expand_topics(table):
+    """Enrich topic granularity: classify each dictionary value once, remap indices."""
+    indices, dictionary = _dictionary(table, 'topic_category')
+    # Missing values take the trailing "general" slot, as in classify_topics
+    labels = np.array([expand_topic_category(v) for v in dictionary] + ["general"], dtype=object)
+    categories, remap = np.unique(labels, return_inverse=True)
+    topics = pa.DictionaryArray.from_arrays(pa.array(remap[indices].astype(np.int32)),
+                                            pa.array(categories.tolist(), pa.string()))
+    return table.set_column(table.column_names.index('topic_category'), 'topic_category', topics)
+
+
+def add_feature_buckets(table):
+    """Bucket ids from the numeric buffers (same cuts as feature_buckets)."""
+    for col_name, (source, cuts) in BUCKET_SPECS.items():
+        table = table.append_column(col_name, pa.array(bucketize_array(table[source].to_numpy(), cuts)))
+    return table
+
+
+def add_interaction_features(table):
+    inputs = {c: table[c].to_numpy() for c in NUMERICAL_COLS}
+    for col_name, calc in INTERACTIONS.items():
+        table = table.append_column(col_name, pa.array(calc(inputs)))
+    return table
+
+
+def encode_and_normalize(table):
+    """Label codes straight from dictionary indices, then StandardScaler on the numericals.
+
+    Classes and codes match LabelEncoder().fit_transform(column.astype(str)).
+    """
+    from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+    print("\n🔢 Encoding categorical features...")
+
+    encoders = {}
+    categorical_cols = [c for c in table.column_names if _is_categorical(table, c)]
+    categorical_cols += [c for c in BUCKET_COLUMNS if c in table.column_names]
+
+    for col in categorical_cols:
+        if _is_categorical(table, col):
+            indices, labels = _dictionary(table, col)
+            # Nulls take a trailing 'nan' label, as astype(str) would give them
+            indices = np.where(indices < 0, len(labels), indices)
+            labels = [str(v) for v in labels] + ['nan']
+        else:
+            uniques, indices = np.unique(table[col].to_numpy(), return_inverse=True)
+            labels = [str(v) for v in uniques]
+        present = np.bincount(indices, minlength=len(labels)) > 0
+        le = LabelEncoder()
+        le.classes_, ranks = np.unique(np.array(labels, dtype=object)[present], return_inverse=True)
+        codes = np.full(len(labels), -1, dtype=np.int64)
+        codes[present] = ranks
+        table = table.append_column(col + '_encoded', pa.array(codes[indices]))
+        encoders[col] = le
+
+    print(f"✅ Encoded {len(categorical_cols)} categorical features")
+
+    print("\n📏 Normalizing numerical features...")
+    numerical_cols = [c for c in NUMERICAL_COLS if c in table.column_names]
+
+    scaler = StandardScaler()
+    # Same column-major layout the pandas backend hands to the scaler, so sums match bit for bit
+    scaled = scaler.fit_transform(pd.DataFrame({c: table[c].to_numpy() for c in numerical_cols}, copy=False))
+    for j, col in enumerate(numerical_cols):
+        table = table.set_column(table.column_names.index(col), col, pa.array(scaled[:, j]))
+
+    print(f"✅ Normalized {len(numerical_cols)} numerical features")
+
+    return table, encoders, scaler
+
+
+def prepare_for_ml(table):
+    """Model columns + target as a pandas DataFrame (same layout as the pandas backend)."""
+    print("\n🎯 Preparing for ML...")
+
+    names = table.column_names
+    encoded = [c for c in names if c.endswith('_encoded')]
+    numerical = [c for c in NUMERICAL_COLS if c in names]
+    engineered = [c for c in BUCKET_COLUMNS if c in names]
+    interactions = [c for c in names if c in INTERACTIONS]
+
+    final_cols = encoded + numerical + engineered + interactions + [TARGET]
+    df = pd.DataFrame({c: table[c].to_numpy() for c in final_cols}, copy=False)
+
+    print(f"✅ Final shape: {df.shape}")
+    return df
+
+
+def fit_pipeline(source, load=read_table, cache=None, profiler=None):
+    """Arrow counterpart of feature_transform.fit_pipeline (same stages, same outputs).
+
+    Returns (df, fill_values, encoders, scaler) with df a pandas DataFrame.
+    """
+    _require_arrow()
+    run = cache.run if cache is not None else run_stages
+    measured = profiler.wrap if profiler is not None else (lambda name, func: func)
+    stages = [('load', load)] if load else []
+    stages += [('select', select_features), ('clean', clean_data)]
+    table = run([(name, measured(name, func), {}) for name, func in stages], source)
+    fill_values = fit_fill_values(table)  # filling leaves medians/modes unchanged
+    stages = [
+        ('topic', expand_topics),
+        ('buckets', add_feature_buckets),
+        ('interactions', add_interaction_features),
+        ('encode', encode_and_normalize),
+    ]
+    table, encoders, scaler = run([(name, measured(name, func), {}) for name, func in stages], table)
+    df = measured('prepare', prepare_for_ml)(table)
+    return df, fill_values, encoders, scaler
@@ -0,0 +1,96 @@
+"""
+AZURE CLIENTS - Process-wide storage clients, credentials and secrets
+One DefaultAzureCredential per process (azure-identity caches its tokens),
+one BlobServiceClient per account over a keep-alive connection pool, and a
+TTL cache for secrets and account keys. Transfers then pay credential
+probing, token requests and TLS handshakes once per process, not per file.
+Azure SDK modules are imported on first use.
+"""
+
+import threading
+import time
+
+POOL_SIZE = 16  # connections kept alive per account (>= transfer concurrency)
+SECRET_TTL = 15 * 60
+
+
+class TTLCache:
+    """Values by key, each kept for ttl seconds. Failed loads (None) are not cached."""
+
+    def __init__(self, ttl=SECRET_TTL):
+        self.ttl = ttl
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, loader, ttl=None):
+        """Cached value for key, calling loader() when missing or expired."""
+        # Held during the load so concurrent callers share one lookup
+        with self._lock:
+            hit = self._values.get(key)
+            if hit is not None and hit[1] > time.monotonic():
+                return hit[0]
+            value = loader()
+            if value is not None:
+                self._values[key] = (value, time.monotonic() + (self.ttl if ttl is None else ttl))
+            return value
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+secrets = TTLCache()
+_credential = None
+_services = {}
+_lock = threading.Lock()
+
+
+def get_credential():
+    """Process-wide DefaultAzureCredential (it caches and refreshes its own tokens)."""
+    global _credential
+    with _lock:
+        if _credential is None:
+            from azure.identity import DefaultAzureCredential
+            _credential = DefaultAzureCredential()
+        return _credential
+
+
+def _transport(pool_size):
+    """Requests transport with keep-alive connections shared by every blob client of an account."""
+    import requests
+    from azure.core.pipeline.transport import RequestsTransport
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return RequestsTransport(session=session, session_owner=False)
+
+
+def _service(key, create):
+    with _lock:
+        if key not in _services:
+            _services[key] = create()
+        return _services[key]
+
+
+def get_blob_service(account_url, credential=None, pool_size=POOL_SIZE):
+    """Shared BlobServiceClient for account_url.
+
+    credential defaults to the process-wide credential; an account key
+    string may be passed instead.
+    """
+    from azure.storage.blob import BlobServiceClient
+    credential = credential if credential is not None else get_credential()
+
+    def create():
+        return BlobServiceClient(account_url=account_url, credential=credential,
+                                 transport=_transport(pool_size))
+    # Keyed on the credential itself: the cache holds a reference, so a later
+    # credential can never be mistaken for it (as one reusing its id() could)
+    key = ('url', account_url, credential)
+    try:
+        hash(key)
+    except TypeError:  # e.g. a dict of account name and key: not shared
+        return create()
+    return _service(key, create)
+
@@ -1,9 +1,11 @@
 """
 Azure Configuration
 Store credentials in environment variables or Azure Key Vault in production
+Secrets and keys are cached per process for azure_clients.SECRET_TTL
 """
 
 import os
+from azure_clients import secrets
 
 # Azure Storage Configuration
 STORAGE_ACCOUNT_NAME = "stengml707"
@@ -12,6 +14,9 @@ CONTAINER_RAW_DATA = "raw-data"
 CONTAINER_CLEANED_DATA = "cleaned-data"
 CONTAINER_MODELS = "models"
 
+# Storage backend: azure://<account>, file:///<dir> (e.g. a local NVMe cache) or memory://<name>
+STORAGE_URL = os.getenv("STORAGE_URL", f"azure://{STORAGE_ACCOUNT_NAME}")
+
 # Azure Key Vault
 KEY_VAULT_NAME = "kvengml8449"
 KEY_VAULT_URI = f"https://{KEY_VAULT_NAME}.vault.azure.net/"
@@ -26,28 +31,36 @@ LOCAL_DATA_PATH = "data/processed/cleaned_data.csv"
 LOCAL_MODEL_PATH = "models/model.pkl"
 
 def get_storage_connection_string():
-    """Get storage connection string from environment or Key Vault"""
+    """Get storage connection string from environment or Key Vault (cached)"""
     # Try environment variable first
     conn_str = os.getenv("AZURE_STORAGE_CONNECTION_STRING")
     
     if not conn_str:
-        # Retrieve from Key Vault
-        try:
-            from azure.identity import InteractiveBrowserCredential
-            from azure.keyvault.secrets import SecretClient
-            
-            credential = InteractiveBrowserCredential(tenant_id=TENANT_ID)
-            client = SecretClient(vault_url=KEY_VAULT_URI, credential=credential)
-            secret = client.get_secret("storage-connection-string")
-            conn_str = secret.value
-        except Exception as e:
-            print(f"Warning: Could not retrieve connection string from Key Vault: {e}")
-            print("Using account name authentication instead")
-            return None
+        conn_str = secrets.get(("key-vault", KEY_VAULT_URI, "storage-connection-string"),
+                               _load_connection_string)
     
     return conn_str
 
+def _load_connection_string():
+    """Retrieve the connection string from Key Vault (one interactive login)"""
+    try:
+        from azure.identity import InteractiveBrowserCredential
+        from azure.keyvault.secrets import SecretClient
+        
+        credential = InteractiveBrowserCredential(tenant_id=TENANT_ID)
+        client = SecretClient(vault_url=KEY_VAULT_URI, credential=credential)
+        secret = client.get_secret("storage-connection-string")
+        return secret.value
+    except Exception as e:
+        print(f"Warning: Could not retrieve connection string from Key Vault: {e}")
+        print("Using account name authentication instead")
+        return None
+
 def get_storage_account_key():
+    """Get storage account key (Azure CLI lookup, cached)"""
+    return secrets.get(("account-key", STORAGE_ACCOUNT_NAME), _load_storage_account_key)
+
+def _load_storage_account_key():
     """Get storage account key using Azure CLI"""
     import subprocess
     import json
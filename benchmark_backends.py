@@ -0,0 +1,88 @@
+"""
+BACKEND BENCHMARK - Side-by-side timings of the preprocessing backends
+Runs the in-memory fit pipeline (load → prepare) on the pandas and arrow
+backends, on the raw dataset and on a scaled-up copy (rows repeated).
+Usage: python benchmark_backends.py [raw.csv] [scale]
+"""
+
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from sklearn.preprocessing import StandardScaler  # noqa: F401  (import cost kept out of the timings)
+from feature_transform import fit_pipeline, read_raw_csv
+import arrow_backend
+
+RAW_FILE = "archive (1)/Social Media Engagement Dataset.csv"
+REPORT = "data/processed/backend_timings.json"
+
+BACKENDS = {
+    'pandas': lambda path: fit_pipeline(path, read_raw_csv),
+    'arrow': lambda path: arrow_backend.fit_pipeline(path),
+}
+
+
+def scaled_copy(input_file, scale, directory):
+    """Raw CSV with its data rows repeated scale times."""
+    path = os.path.join(directory, f"raw_x{scale}.csv")
+    with open(input_file, 'rb') as src, open(path, 'wb') as dst:
+        header = src.readline()
+        body = src.read()
+        if not body.endswith(b'\n'):
+            body += b'\n'
+        dst.write(header)
+        for _ in range(scale):
+            dst.write(body)
+    return path
+
+
+def time_backends(path, repeats=3):
+    """Best-of-repeats seconds per backend for one input file."""
+    timings = {}
+    for name, run in BACKENDS.items():
+        if name == 'arrow' and not arrow_backend.ARROW_AVAILABLE:
+            continue
+        best = None
+        for _ in range(repeats):
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                df = run(path)[0]
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        timings[name] = {'seconds': round(best, 4), 'rows': len(df)}
+    return timings
+
+
+def benchmark(input_file=RAW_FILE, scale=32, repeats=3):
+    print("\n" + "="*60)
+    print("⏱️  PREPROCESSING BACKEND BENCHMARK")
+    print("="*60)
+
+    workdir = tempfile.mkdtemp()
+    try:
+        results = []
+        for factor in (1, scale):
+            path = input_file if factor == 1 else scaled_copy(input_file, factor, workdir)
+            timings = time_backends(path, repeats)
+            results.append({'scale': factor, 'timings': timings})
+            line = "   ".join(f"{name}: {t['seconds']:.3f}s" for name, t in timings.items())
+            rows = next(iter(timings.values()))['rows']
+            print(f"📊 x{factor} ({rows:,} rows)   {line}")
+    finally:
+        shutil.rmtree(workdir)
+
+    report = {'input': input_file, 'cpus': os.cpu_count(), 'repeats': repeats, 'results': results}
+    os.makedirs(os.path.dirname(REPORT), exist_ok=True)
+    with open(REPORT, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Saved: {REPORT}")
+    return report
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    benchmark(args[0] if args else RAW_FILE, int(args[1]) if len(args) > 1 else 32)
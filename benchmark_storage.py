@@ -0,0 +1,86 @@
+"""
+STORAGE BENCHMARK - Throughput of the storage backends
+Times put (transfer engine), get, stream (open_read), stat and list on each
+storage URL with a synthetic artifact. Runs offline on memory:// and a
+temporary file:// store unless URLs are given.
+Usage: python benchmark_storage.py [size_mb] [url ...]
+"""
+
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from blob_storage import open_store
+from transfer_engine import upload_all
+
+REPORT = "data/processed/storage_timings.json"
+CONTAINER = "benchmark"
+
+
+def _best(func, repeats):
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def _drain(store, name):
+    with store.open_read(CONTAINER, name) as stream:
+        while stream.read(1024 * 1024):
+            pass
+
+
+def time_store(url, payload, repeats=3):
+    """Best-of-repeats seconds (and MB/s where it applies) per operation on one store."""
+    store = open_store(url)
+    name = "artifact.bin"
+    mb = len(payload) / 1e6
+    with contextlib.redirect_stdout(io.StringIO()):
+        ops = {
+            'put': _best(lambda: upload_all(store, [(payload, CONTAINER, name)]), repeats),
+            'get': _best(lambda: bytes(store.get(CONTAINER, name)), repeats),
+            'stream': _best(lambda: _drain(store, name), repeats),
+            'stat': _best(lambda: store.size(CONTAINER, name), repeats),
+            'list': _best(lambda: store.list(CONTAINER), repeats),
+        }
+    return {op: {'seconds': round(s, 6), 'mb_per_sec': round(mb / s, 1) if op in ('put', 'get', 'stream') else None}
+            for op, s in ops.items()}
+
+
+def benchmark(urls=None, size_mb=64, repeats=3):
+    print("\n" + "="*60)
+    print("⏱️  STORAGE BACKEND BENCHMARK")
+    print("="*60)
+
+    workdir = tempfile.mkdtemp()
+    try:
+        urls = urls or ["memory://benchmark", "file://" + workdir]
+        payload = os.urandom(size_mb * 1024 * 1024)
+        results = []
+        for url in urls:
+            timings = time_store(url, payload, repeats)
+            results.append({'url': url, 'timings': timings})
+            line = "   ".join(f"{op}: {t['mb_per_sec']:.0f} MB/s" if t['mb_per_sec'] else f"{op}: {t['seconds']*1e3:.2f}ms"
+                             for op, t in timings.items())
+            print(f"📊 {url}\n   {line}")
+    finally:
+        shutil.rmtree(workdir)
+
+    report = {'size_mb': size_mb, 'repeats': repeats, 'results': results}
+    os.makedirs(os.path.dirname(REPORT), exist_ok=True)
+    with open(REPORT, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Saved: {REPORT}")
+    return report
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    benchmark(args[1:] or None, int(args[0]) if args else 64)
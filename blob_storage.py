@@ -0,0 +1,354 @@
+"""
+BLOB STORAGE - Storage layer for raw and cleaned data blobs
+BlobStore is the interface pipelines and apps talk to (get, write, open_read,
+list, properties); AzureBlobStore backs it with a storage account,
+LocalBlobStore with a directory (mmap reads, e.g. a local NVMe cache) and
+MemoryBlobStore with a dict (tests, offline runs). open_store(url) picks
+the backend from a URL. open_read() streams a remote blob through parallel
+ranged reads with a bounded prefetch window.
+Large uploads go through staged blocks that are committed at the end, so
+an interrupted upload can resume from the blocks already staged.
+properties() exposes size, content MD5 and ETag for skip-unchanged syncs.
+"""
+
+import hashlib
+import io
+import mmap
+import os
+import shutil
+import threading
+import urllib.parse
+import urllib.request
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+CHUNK_SIZE = 4 * 1024 * 1024
+MAX_WORKERS = 4
+
+
+class BlobStore(ABC):
+    """Minimal blob interface: size, ranged and whole reads, writes, listing, block staging."""
+
+    @abstractmethod
+    def size(self, container, name):
+        """Blob size in bytes."""
+
+    @abstractmethod
+    def read_range(self, container, name, offset, length):
+        """length bytes of the blob starting at offset."""
+
+    def get(self, container, name):
+        """Whole blob as a bytes-like object."""
+        return self.read_range(container, name, 0, self.size(container, name))
+
+    @abstractmethod
+    def list(self, container, prefix=''):
+        """Sorted names of the blobs in container that start with prefix."""
+
+    @abstractmethod
+    def write(self, container, name, data, content_md5=None):
+        """Replace the blob with data; content_md5 (hex) is stored with it where supported."""
+
+    @abstractmethod
+    def properties(self, container, name):
+        """{'size', 'md5' (hex or None), 'etag'} of a blob, or None if it does not exist."""
+
+    @abstractmethod
+    def stage_block(self, container, name, block_id, data):
+        """Upload data as an uncommitted block of the blob."""
+
+    @abstractmethod
+    def staged_blocks(self, container, name):
+        """Ids of blocks staged but not yet committed."""
+
+    @abstractmethod
+    def commit_blocks(self, container, name, block_ids, content_md5=None):
+        """Replace the blob with the staged blocks, in order."""
+
+    def open_read(self, container, name, chunk_size=CHUNK_SIZE, max_workers=MAX_WORKERS):
+        """Buffered stream over a blob, downloaded as parallel ranged reads."""
+        return io.BufferedReader(RangedReader(self, container, name, chunk_size, max_workers),
+                                 buffer_size=chunk_size)
+
+
+class RangedReader(io.RawIOBase):
+    """Sequential reader that keeps up to max_workers ranges downloading ahead.
+
+    Ranges are consumed in order, so the consumer (e.g. a chunked CSV
+    parser) works on one range while the next ones transfer; memory stays
+    bounded by (max_workers + 1) * chunk_size.
+    """
+
+    def __init__(self, store, container, name, chunk_size=CHUNK_SIZE, max_workers=MAX_WORKERS):
+        super().__init__()
+        self.store = store
+        self.container = container
+        self.name = name
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self.length = store.size(container, name)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers)
+        self._pending = deque()
+        self._next_offset = 0
+        self._current = memoryview(b'')
+        self._schedule()
+
+    def _schedule(self):
+        while len(self._pending) < self.max_workers and self._next_offset < self.length:
+            length = min(self.chunk_size, self.length - self._next_offset)
+            self._pending.append(self._pool.submit(
+                self.store.read_range, self.container, self.name, self._next_offset, length))
+            self._next_offset += length
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if not self._current:
+            if not self._pending:
+                return 0
+            self._current = memoryview(self._pending.popleft().result())
+            self._schedule()
+        n = min(len(buffer), len(self._current))
+        buffer[:n] = self._current[:n]
+        self._current = self._current[n:]
+        return n
+
+    def close(self):
+        if not self.closed:
+            for future in self._pending:
+                future.cancel()
+            self._pending.clear()
+            self._pool.shutdown(wait=False)
+        super().close()
+
+
+class AzureBlobStore(BlobStore):
+    """Azure Storage account behind a BlobServiceClient."""
+
+    def __init__(self, service_client):
+        self.service = service_client
+
+    def _blob(self, container, name):
+        return self.service.get_blob_client(container=container, blob=name)
+
+    def size(self, container, name):
+        return self._blob(container, name).get_blob_properties().size
+
+    def read_range(self, container, name, offset, length):
+        return self._blob(container, name).download_blob(offset=offset, length=length).readall()
+
+    def get(self, container, name):
+        return self._blob(container, name).download_blob(max_concurrency=MAX_WORKERS).readall()
+
+    def list(self, container, prefix=''):
+        client = self.service.get_container_client(container)
+        return sorted(b.name for b in client.list_blobs(name_starts_with=prefix or None))
+
+    @staticmethod
+    def _settings(content_md5):
+        if content_md5 is None:
+            return None
+        from azure.storage.blob import ContentSettings
+        return ContentSettings(content_md5=bytearray.fromhex(content_md5))
+
+    def write(self, container, name, data, content_md5=None):
+        self._blob(container, name).upload_blob(data, overwrite=True,
+                                                content_settings=self._settings(content_md5))
+
+    def properties(self, container, name):
+        from azure.core.exceptions import ResourceNotFoundError
+        try:
+            props = self._blob(container, name).get_blob_properties()
+        except ResourceNotFoundError:
+            return None
+        md5 = props.content_settings.content_md5
+        return {'size': props.size, 'md5': bytes(md5).hex() if md5 else None, 'etag': props.etag}
+
+    def stage_block(self, container, name, block_id, data):
+        self._blob(container, name).stage_block(block_id, data)
+
+    def staged_blocks(self, container, name):
+        from azure.core.exceptions import ResourceNotFoundError
+        try:
+            _, uncommitted = self._blob(container, name).get_block_list('uncommitted')
+        except ResourceNotFoundError:
+            return set()
+        return {block.id for block in uncommitted}
+
+    def commit_blocks(self, container, name, block_ids, content_md5=None):
+        from azure.storage.blob import BlobBlock
+        self._blob(container, name).commit_block_list([BlobBlock(block_id=i) for i in block_ids],
+                                                      content_settings=self._settings(content_md5))
+
+
+class LocalBlobStore(BlobStore):
+    """Containers as sub-directories of root.
+
+    Reads are memory-mapped: get() and read_range() return zero-copy
+    memoryviews over the page cache, and open_read() is a plain buffered
+    file (the OS read-ahead replaces the ranged prefetch).
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def path(self, container, name):
+        return os.path.join(self.root, container, name)
+
+    def size(self, container, name):
+        return os.path.getsize(self.path(container, name))
+
+    def _map(self, container, name):
+        with open(self.path(container, name), 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return memoryview(b'')
+            # The view keeps the mapping alive after the file is closed
+            return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def read_range(self, container, name, offset, length):
+        return self._map(container, name)[offset:offset + length]
+
+    def get(self, container, name):
+        return self._map(container, name)
+
+    def open_read(self, container, name, chunk_size=CHUNK_SIZE, max_workers=MAX_WORKERS):
+        return open(self.path(container, name), 'rb', buffering=chunk_size)
+
+    def list(self, container, prefix=''):
+        base = os.path.join(self.root, container)
+        names = []
+        for directory, _, files in os.walk(base):
+            for file in files:
+                if file.startswith('.tmp-'):
+                    continue
+                name = os.path.relpath(os.path.join(directory, file), base).replace(os.sep, '/')
+                if name.startswith(prefix):
+                    names.append(name)
+        return sorted(names)
+
+    def _replace(self, container, name, pieces):
+        """Write pieces to a temp file, then rename it over the blob (readers never see a partial file)."""
+        path = self.path(container, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        directory, base = os.path.split(path)
+        tmp = os.path.join(directory, f".tmp-{os.getpid()}-{threading.get_ident()}-{base}")
+        with open(tmp, 'wb') as f:
+            for piece in pieces:
+                f.write(piece)
+        os.replace(tmp, path)
+
+    def write(self, container, name, data, content_md5=None):
+        self._replace(container, name, [data])
+
+    def properties(self, container, name):
+        path = self.path(container, name)
+        if not os.path.isfile(path):
+            return None
+        digest = hashlib.md5()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(CHUNK_SIZE), b''):
+                digest.update(block)
+        stat = os.stat(path)
+        return {'size': stat.st_size, 'md5': digest.hexdigest(), 'etag': f"{stat.st_mtime_ns}-{stat.st_size}"}
+
+    def _staging(self, container, name):
+        return os.path.join(self.root, '.staging', container, name)
+
+    def stage_block(self, container, name, block_id, data):
+        staging = self._staging(container, name)
+        os.makedirs(staging, exist_ok=True)
+        with open(os.path.join(staging, block_id), 'wb') as f:
+            f.write(data)
+
+    def staged_blocks(self, container, name):
+        staging = self._staging(container, name)
+        return set(os.listdir(staging)) if os.path.isdir(staging) else set()
+
+    def commit_blocks(self, container, name, block_ids, content_md5=None):
+        staging = self._staging(container, name)
+
+        def blocks():
+            for block_id in block_ids:
+                with open(os.path.join(staging, block_id), 'rb') as f:
+                    yield f.read()
+        self._replace(container, name, blocks())
+        shutil.rmtree(staging)
+        try:
+            os.removedirs(os.path.dirname(staging))  # prune now-empty staging parents
+        except OSError:
+            pass
+
+
+class MemoryBlobStore(BlobStore):
+    """In-process stand-in: blobs kept in a dict."""
+
+    def __init__(self, blobs=None):
+        self.blobs = dict(blobs or {})
+        self.staged = {}
+
+    def size(self, container, name):
+        return len(self.blobs[(container, name)])
+
+    def read_range(self, container, name, offset, length):
+        return bytes(self.blobs[(container, name)][offset:offset + length])
+
+    def get(self, container, name):
+        return self.blobs[(container, name)]
+
+    def list(self, container, prefix=''):
+        return sorted(n for c, n in self.blobs if c == container and n.startswith(prefix))
+
+    def write(self, container, name, data, content_md5=None):
+        self.blobs[(container, name)] = bytes(data)
+
+    def properties(self, container, name):
+        if (container, name) not in self.blobs:
+            return None
+        data = self.blobs[(container, name)]
+        md5 = hashlib.md5(data).hexdigest()
+        return {'size': len(data), 'md5': md5, 'etag': md5}
+
+    def stage_block(self, container, name, block_id, data):
+        self.staged.setdefault((container, name), {})[block_id] = bytes(data)
+
+    def staged_blocks(self, container, name):
+        return set(self.staged.get((container, name), ()))
+
+    def commit_blocks(self, container, name, block_ids, content_md5=None):
+        blocks = self.staged.pop((container, name), {})
+        self.blobs[(container, name)] = b''.join(blocks[i] for i in block_ids)
+
+
+_memory_stores = {}
+
+
+def is_azure_url(url):
+    parsed = urllib.parse.urlparse(url)
+    return parsed.scheme == 'azure' or (parsed.scheme == 'https'
+                                        and parsed.netloc.endswith('.blob.core.windows.net'))
+
+
+def open_store(url, credential=None):
+    """BlobStore for a storage URL.
+
+    azure://<account> or https://<account>.blob.core.windows.net  Azure (shared
+        client; credential defaults to the process credential)
+    file:///<dir> or a plain directory path                         LocalBlobStore
+    memory://<name>                                                 MemoryBlobStore,
+        one per name for the life of the process
+    """
+    parsed = urllib.parse.urlparse(url)
+    scheme = parsed.scheme
+    if is_azure_url(url):
+        from azure_clients import get_blob_service
+        account = parsed.netloc.split('.')[0]
+        return AzureBlobStore(get_blob_service(f"https://{account}.blob.core.windows.net", credential))
+    if scheme == 'memory':
+        return _memory_stores.setdefault(parsed.netloc, MemoryBlobStore())
+    if scheme == 'file':
+        return LocalBlobStore(urllib.request.url2pathname(parsed.netloc + parsed.path))
+    if len(scheme) <= 1:  # plain path (a Windows drive letter parses as a scheme)
+        return LocalBlobStore(url)
+    raise ValueError(f"Unsupported storage URL: {url}")
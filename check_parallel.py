@@ -0,0 +1,85 @@
+"""
+PARALLEL CHECK - Sharded preprocessing must match the serial run byte for byte
+Writes a synthetic raw export whose numerical columns are full of zeros
+(signed and unsigned) and missing values, so medians land on zero, then runs
+the serial preprocess() and preprocess_parallel() on it in scratch
+directories and compares the bytes of the two cleaned_data.csv files.
+Usage: python check_parallel.py [rows] [n_jobs]
+"""
+
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import numpy as np
+import pandas as pd
+from feature_transform import NUMERICAL_COLS, CATEGORICAL_COLS, TARGET
+from preprocess_clean import preprocess, preprocess_parallel, CLEANED_CSV
+
+CATEGORIES = {
+    'day_of_week': ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'],
+    'platform': ['Instagram', 'Twitter', 'Facebook', 'Reddit', 'YouTube'],
+    'topic_category': ['Product Launch', 'Customer Support', 'Sports', 'Technology', 'Politics'],
+    'emotion_type': ['Happy', 'Sad', 'Angry', 'Neutral', 'Excited'],
+    'location': ['London', 'Paris', 'Tokyo', 'Sydney', 'Toronto'],
+    'language': ['en', 'fr', 'es', 'de', 'ja'],
+}
+
+
+def synthetic_raw(path, rows=3000, seed=0):
+    """Raw CSV where about half of every numerical value is -0.0 or 0.0 and some are missing."""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({col: rng.choice(CATEGORIES[col], rows) for col in CATEGORICAL_COLS})
+    for col in NUMERICAL_COLS + [TARGET]:
+        values = rng.normal(size=rows).round(2)
+        zeros = rng.random(rows) < 0.5
+        values[zeros] = rng.choice([-0.0, 0.0], zeros.sum())
+        values[rng.random(rows) < 0.05] = np.nan
+        df[col] = values
+    df.to_csv(path, index=False)
+    return path
+
+
+def _run(func, raw, directory, **kwargs):
+    """cleaned_data.csv bytes of one preprocessing run inside directory."""
+    cwd = os.getcwd()
+    os.chdir(directory)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            func(raw, **kwargs)
+        with open(CLEANED_CSV, 'rb') as f:
+            return f.read()
+    finally:
+        os.chdir(cwd)
+
+
+def check(rows=3000, n_jobs=3):
+    print("\n" + "="*60)
+    print("🔍 PARALLEL vs SERIAL PREPROCESSING CHECK")
+    print("="*60)
+
+    workdir = tempfile.mkdtemp()
+    try:
+        raw = synthetic_raw(os.path.join(workdir, "raw.csv"), rows)
+        os.makedirs(os.path.join(workdir, "serial"))
+        os.makedirs(os.path.join(workdir, "parallel"))
+        serial = _run(preprocess, raw, os.path.join(workdir, "serial"), cache=False, profile=False)
+        parallel = _run(preprocess_parallel, raw, os.path.join(workdir, "parallel"), n_jobs=n_jobs)
+    finally:
+        shutil.rmtree(workdir)
+
+    if serial != parallel:
+        lines = zip(serial.splitlines(), parallel.splitlines())
+        first = next((i for i, (a, b) in enumerate(lines) if a != b), None)
+        print(f"❌ cleaned_data.csv differs ({len(serial):,} vs {len(parallel):,} bytes, first at line {first})")
+        return False
+    print(f"✅ cleaned_data.csv identical ({len(serial):,} bytes, {rows:,} rows, {n_jobs} workers)")
+    return True
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    ok = check(int(args[0]) if args else 3000, int(args[1]) if len(args) > 1 else 3)
+    sys.exit(0 if ok else 1)
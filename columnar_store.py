@@ -0,0 +1,164 @@
+"""
+COLUMNAR STORE - Typed, memory-mappable cleaned_data
+One .npy file per column plus schema.json, with compact dtypes:
+int8/int16 label codes and bucket ids, float32 features, float64 target.
+float32 rounds features to about 7 significant digits on disk;
+load_cleaned_data widens them back to float64, so models that work in
+float64 (HistGradientBoosting binning, Ridge, GradientBoosting) get the
+dtype they always got. The target keeps full precision.
+"""
+
+import io
+import json
+import os
+import numpy as np
+import pandas as pd
+from feature_buckets import BUCKET_COLUMNS
+from feature_transform import TARGET
+
+SCHEMA_FILE = "schema.json"
+
+
+def columnar_path(csv_path):
+    """Columnar directory that sits next to a cleaned_data CSV."""
+    return os.path.splitext(csv_path)[0] + "_columnar"
+
+
+def _code_dtype(n_classes):
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_classes <= np.iinfo(dtype).max + 1:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def compact_dtypes(columns, encoders):
+    """Smallest safe dtype per output column."""
+    dtypes = {}
+    for col in columns:
+        if col.endswith('_encoded'):
+            dtypes[col] = _code_dtype(len(encoders[col[:-len('_encoded')]].classes_))
+        elif col in BUCKET_COLUMNS:
+            dtypes[col] = np.dtype(np.int8)
+        elif col == TARGET:
+            dtypes[col] = np.dtype(np.float64)
+        else:
+            dtypes[col] = np.dtype(np.float32)
+    return dtypes
+
+
+class ColumnarWriter:
+    """Preallocated per-column .npy files, filled chunk by chunk at row offsets."""
+
+    def __init__(self, path, dtypes, rows):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.dtypes = dtypes
+        self.rows = rows
+        self.arrays = {
+            col: np.lib.format.open_memmap(os.path.join(path, f"{col}.npy"), mode='w+', dtype=dtype, shape=(rows,))
+            for col, dtype in dtypes.items()
+        }
+
+    def write(self, offset, df):
+        for col, arr in self.arrays.items():
+            arr[offset:offset + len(df)] = df[col].to_numpy()
+
+    def close(self):
+        for arr in self.arrays.values():
+            arr.flush()
+        self.arrays = {}
+        _write_schema(self.path, self.dtypes, self.rows)
+
+
+def _write_schema(path, dtypes, rows):
+    schema = {
+        'rows': rows,
+        'columns': [{'name': col, 'dtype': np.dtype(dtype).str} for col, dtype in dtypes.items()],
+    }
+    with open(os.path.join(path, SCHEMA_FILE), 'w') as f:
+        json.dump(schema, f, indent=2)
+
+
+def _read_schema(path):
+    with open(os.path.join(path, SCHEMA_FILE)) as f:
+        return json.load(f)
+
+
+def save_columnar(df, path, encoders):
+    """Write a prepared DataFrame as compact, memory-mappable columns."""
+    writer = ColumnarWriter(path, compact_dtypes(df.columns, encoders), len(df))
+    writer.write(0, df)
+    writer.close()
+
+
+def _append_npy(filename, values):
+    """Append to a 1-D .npy file in place: write the new rows, then patch the header.
+
+    numpy pads headers so the length fits 21 digits, so the header only needs
+    rewriting in place; returns False if it would not fit (caller rewrites).
+    """
+    with open(filename, 'r+b') as f:
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran, dtype = np.lib.format.read_array_header_2_0(f)
+        offset = f.tell()
+        header = io.BytesIO()
+        np.lib.format.write_array_header_1_0(
+            header, {'descr': np.lib.format.dtype_to_descr(dtype), 'fortran_order': fortran,
+                     'shape': (shape[0] + len(values),)})
+        if len(header.getvalue()) != offset:
+            return False
+        f.seek(offset + shape[0] * dtype.itemsize)
+        f.write(np.ascontiguousarray(values, dtype=dtype).tobytes())
+        f.seek(0)
+        f.write(header.getvalue())
+    return True
+
+
+def append_columnar(df, path, encoders):
+    """Append prepared rows to an existing columnar store, touching only the new rows.
+
+    Label-code columns whose vocabulary outgrew their dtype are widened,
+    which rewrites that one column.
+    """
+    schema = _read_schema(path)
+    dtypes = {c['name']: np.dtype(c['dtype']) for c in schema['columns']}
+    needed = compact_dtypes(dtypes, encoders)
+    for col, dtype in dtypes.items():
+        filename = os.path.join(path, f"{col}.npy")
+        values = df[col].to_numpy()
+        wide = np.promote_types(dtype, needed[col])
+        if wide != dtype or not _append_npy(filename, values):
+            old = np.load(filename)
+            np.save(filename, np.concatenate([old.astype(wide), values.astype(wide)]))
+        dtypes[col] = wide
+    _write_schema(path, dtypes, schema['rows'] + len(df))
+
+
+def load_columnar(path, mmap=True):
+    """Load the columnar store; with mmap the columns are zero-copy views of the files."""
+    schema = _read_schema(path)
+    mode = 'r' if mmap else None
+    columns = {c['name']: np.load(os.path.join(path, f"{c['name']}.npy"), mmap_mode=mode)
+               for c in schema['columns']}
+    return pd.DataFrame(columns, copy=False)
+
+
+def load_cleaned_data(filepath="data/processed/cleaned_data.csv"):
+    """Load cleaned data, preferring the columnar store when it is at least as new as the CSV.
+
+    preprocess_clean writes the columnar store last, so a newer CSV means it
+    was regenerated by something else and is the fresher copy. float32
+    feature columns are widened to float64 (the other columns stay mapped).
+    """
+    store = columnar_path(filepath)
+    schema = os.path.join(store, SCHEMA_FILE)
+    if os.path.exists(schema) and (not os.path.exists(filepath)
+                                   or os.path.getmtime(schema) >= os.path.getmtime(filepath)):
+        df = load_columnar(store)
+        for col in df.columns[df.dtypes == np.float32]:
+            df[col] = df[col].astype(np.float64)
+        return df
+    return pd.read_csv(filepath)
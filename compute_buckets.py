@@ -6,13 +6,14 @@ Data is already preprocessed; just analyze engagement_rate distribution
 import pandas as pd
 import numpy as np
 from sklearn.metrics import mean_absolute_error
+from columnar_store import load_cleaned_data
 
 print("\n" + "="*70)
 print("📊 REGRESSION BALANCING: Bucket Analysis")
 print("="*70)
 
 # Load preprocessed data
-df = pd.read_csv("data/processed/cleaned_data.csv")
+df = load_cleaned_data("data/processed/cleaned_data.csv")
 engagement = df['engagement_rate']
 
 print(f"\n📈 Engagement Rate Statistics:")
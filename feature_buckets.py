@@ -0,0 +1,47 @@
+"""
+FEATURE BUCKETS - Shared bucketing engine
+Bins continuous features against sorted cut arrays.
+Used by every preprocess_*.py variant and by the apps.
+"""
+
+import bisect
+import numpy as np
+
+# Bucket definitions: bucket column -> (source feature, sorted thresholds)
+BUCKET_SPECS = {
+    'sentiment_bucket': ('sentiment_score', (-0.4, -0.1, 0.1, 0.4)),
+    'toxicity_bucket': ('toxicity_score', (0.2, 0.4, 0.6, 0.8)),
+    'past_perf_bucket': ('user_past_sentiment_avg', (-0.2, 0.0, 0.2, 0.5)),
+    'growth_bucket': ('user_engagement_growth', (-0.2, 0.0, 0.2, 0.5)),
+}
+
+BUCKET_COLUMNS = list(BUCKET_SPECS)
+
+# Cut arrays are built once so column binning never re-allocates them
+_CUT_ARRAYS = {name: np.asarray(cuts, dtype=np.float64) for name, (_, cuts) in BUCKET_SPECS.items()}
+
+
+def bucketize(val, cuts):
+    """Bucketize a single value: index of the first cut with val <= cut (scalar fast path)."""
+    if val != val:
+        # NaN never satisfies val <= cut, so it lands past the last cut
+        return len(cuts)
+    return bisect.bisect_left(cuts, val)
+
+
+def bucketize_array(values, cuts):
+    """Bucketize a whole column in one vectorized pass (same semantics as bucketize)."""
+    cuts = np.asarray(cuts, dtype=np.float64)
+    return np.searchsorted(cuts, np.asarray(values, dtype=np.float64), side='left')
+
+
+def add_feature_buckets(df):
+    """Add coarse buckets to help tree/boosting models capture non-linearities."""
+    for col_name, (source, _) in BUCKET_SPECS.items():
+        df[col_name] = bucketize_array(df[source].to_numpy(dtype=np.float64), _CUT_ARRAYS[col_name])
+    return df
+
+
+def bucket_row(inputs):
+    """Bucket ids for a single input dict (used on the serving path)."""
+    return {col_name: bucketize(inputs[source], cuts) for col_name, (source, cuts) in BUCKET_SPECS.items()}
@@ -0,0 +1,465 @@
+"""
+FEATURE TRANSFORM - Shared feature engineering
+Select → Clean → Topic → Buckets → Interactions → Encode → Prepare
+One implementation used by every preprocess_*.py variant and by the apps.
+"""
+
+import json
+import os
+import pickle
+import numpy as np
+import pandas as pd
+from pandas.api.types import CategoricalDtype, union_categoricals
+from feature_buckets import BUCKET_SPECS, BUCKET_COLUMNS, add_feature_buckets, bucket_row
+from topic_categories import expand_topic_category, classify_topics
+from stage_cache import run_stages
+
+try:
+    import pyarrow  # noqa: F401
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+TARGET = 'engagement_rate'
+
+# Pre-posting features (data known BEFORE publishing)
+RAW_FEATURES = [
+    'day_of_week', 'platform', 'topic_category', 'sentiment_score',
+    'emotion_type', 'toxicity_score', 'user_past_sentiment_avg',
+    'user_engagement_growth', 'location', 'language'
+]
+
+NUMERICAL_COLS = ['sentiment_score', 'toxicity_score',
+                  'user_past_sentiment_avg', 'user_engagement_growth']
+
+CATEGORICAL_COLS = [c for c in RAW_FEATURES if c not in NUMERICAL_COLS]
+
+# Declared parse dtypes for the raw export (everything else is never read)
+RAW_DTYPES = {**{c: 'category' for c in CATEGORICAL_COLS},
+              **{c: np.float64 for c in NUMERICAL_COLS + [TARGET]}}
+
+# Interaction features; each works on a DataFrame or on a single-row dict
+INTERACTIONS = {
+    'sentiment_toxicity_interaction': lambda r: r['sentiment_score'] * r['toxicity_score'],
+    'abs_sentiment': lambda r: abs(r['sentiment_score']),
+    'perf_momentum': lambda r: r['user_past_sentiment_avg'] * r['user_engagement_growth'],
+    'toxicity_squared': lambda r: r['toxicity_score'] ** 2,
+    'sentiment_squared': lambda r: r['sentiment_score'] ** 2,
+}
+
+
+def read_raw_csv(source, chunksize=None):
+    """Read a raw export, parsing only the feature spec columns with declared dtypes.
+
+    source is a path or a binary buffer. Uses the multi-threaded pyarrow
+    parser when installed. With chunksize an iterator of chunks is returned
+    (C parser); chunk categoricals stay object since categories differ
+    between chunks (concat_raw_chunks joins them back as category). The chunked path reads source strictly forward, so it
+    also works on non-seekable streams.
+    """
+    if chunksize:
+        wanted = set(RAW_FEATURES + [TARGET])
+        dtypes = {**RAW_DTYPES, **{c: object for c in CATEGORICAL_COLS}}
+        return pd.read_csv(source, usecols=lambda c: c in wanted, dtype=dtypes, chunksize=chunksize)
+
+    header = pd.read_csv(source, nrows=0).columns
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    columns = [c for c in RAW_FEATURES + [TARGET] if c in header]
+    dtypes = {c: RAW_DTYPES[c] for c in columns}
+    engine = 'pyarrow' if PYARROW_AVAILABLE else 'c'
+    return pd.read_csv(source, usecols=columns, dtype=dtypes, engine=engine)
+
+
+def concat_raw_chunks(chunks):
+    """One frame from read_raw_csv chunks, with the declared dtypes of the unchunked read.
+
+    Each chunk's categoricals become category as it arrives (so the object
+    strings of only one chunk are alive at a time), and the per-chunk
+    categories are unioned, sorted like read_csv's own category dtype.
+    Columns come in feature spec order, as read_raw_csv returns them.
+    """
+    frames = [chunk.astype({c: 'category' for c in CATEGORICAL_COLS if c in chunk})
+              for chunk in chunks]
+    categorical = [c for c in CATEGORICAL_COLS if c in frames[0]]
+    df = pd.concat([f.drop(columns=categorical) for f in frames], ignore_index=True)
+    for col in categorical:
+        df[col] = union_categoricals([f[col] for f in frames], sort_categories=True)
+    return _project(df, [c for c in RAW_FEATURES + [TARGET] if c in df])
+
+
+def _project(df, columns):
+    """New frame over the given columns that shares their arrays (no copy, no consolidation)."""
+    return pd.DataFrame({c: df[c] for c in columns}, copy=False)
+
+
+def select_features(df):
+    """Keep only pre-posting features (data known BEFORE publishing)."""
+    print("\n📋 Selecting pre-posting features...")
+
+    # Filter to available columns; dead columns are dropped without copying live ones
+    features = [f for f in RAW_FEATURES + [TARGET] if f in df.columns]
+    df = _project(df, features)
+
+    print(f"✅ Selected {len(features)-1} features + 1 target")
+    return df
+
+
+def fit_fill_values(df):
+    """Median for numerical columns, mode for categorical columns."""
+    fill_values = {}
+    for col in df.select_dtypes(include=[np.number]).columns:
+        fill_values[col] = df[col].median()
+    for col in df.select_dtypes(include=['object', 'category']).columns:
+        mode = df[col].mode()
+        if len(mode):
+            fill_values[col] = mode[0]
+    return fill_values
+
+
+def clean_data(df, fill_values=None):
+    """Remove missing values and fill remaining ones.
+
+    Without fill_values the statistics are fitted on df (training). With
+    fitted fill_values no rows are dropped, so every input row is kept.
+    """
+    print("\n🔍 Cleaning data...")
+
+    if fill_values is None:
+        # Drop rows with >30% missing
+        df = df.dropna(thresh=len(df.columns) * 0.7)
+        fill_values = fit_fill_values(df)
+
+    # Fill numerical with median, categorical with mode
+    for col in df.columns:
+        if col in fill_values and df[col].isnull().any():
+            df[col] = df[col].fillna(fill_values[col])
+
+    print(f"✅ Missing values: {df.isnull().sum().sum()}")
+    return df
+
+
+def expand_topics(df):
+    """Enrich topic granularity before encoding."""
+    df['topic_category'] = classify_topics(df['topic_category'])
+    return df
+
+
+def add_interaction_features(df):
+    """Engineer interaction and transformed features for better predictive power."""
+    # Evaluate on the raw arrays: one allocation per feature, no Series temporaries
+    inputs = {c: df[c].to_numpy() for c in NUMERICAL_COLS}
+    for col_name, calc in INTERACTIONS.items():
+        df[col_name] = calc(inputs)
+
+    return df
+
+
+def encode_and_normalize(df):
+    """Encode categoricals and normalize numericals."""
+    # sklearn is only needed to fit; loading and applying a transform never imports it
+    from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+    print("\n🔢 Encoding categorical features...")
+
+    encoders = {}
+    categorical_cols = [c for c in df.columns
+                        if (df[c].dtype == 'object' or isinstance(df[c].dtype, CategoricalDtype))
+                        and c != TARGET]
+    categorical_cols += [c for c in BUCKET_COLUMNS if c in df.columns]
+
+    for col in categorical_cols:
+        # Same classes/codes as LabelEncoder().fit_transform(df[col].astype(str)),
+        # but strings are built and sorted once per distinct value, not per row
+        codes, uniques = pd.factorize(df[col], use_na_sentinel=False)
+        le = LabelEncoder()
+        le.classes_, ranks = np.unique(np.array([str(u) for u in uniques], dtype=object), return_inverse=True)
+        df[col + '_encoded'] = ranks.astype(np.int64)[codes]
+        encoders[col] = le
+
+    print(f"✅ Encoded {len(categorical_cols)} categorical features")
+
+    print("\n📏 Normalizing numerical features...")
+    numerical_cols = [c for c in NUMERICAL_COLS if c in df.columns]
+
+    scaler = StandardScaler()
+    df[numerical_cols] = scaler.fit_transform(df[numerical_cols])
+
+    print(f"✅ Normalized {len(numerical_cols)} numerical features")
+
+    return df, encoders, scaler
+
+
+def prepare_for_ml(df):
+    """Keep only encoded + normalized features + target."""
+    print("\n🎯 Preparing for ML...")
+
+    encoded = [c for c in df.columns if c.endswith('_encoded')]
+    numerical = [c for c in NUMERICAL_COLS if c in df.columns]
+    # Keep engineered buckets too
+    engineered = [c for c in BUCKET_COLUMNS if c in df.columns]
+    # Keep interaction features
+    interactions = [c for c in df.columns if c in INTERACTIONS]
+
+    final_cols = encoded + numerical + engineered + interactions + [TARGET]
+    df = _project(df, final_cols)
+
+    print(f"✅ Final shape: {df.shape}")
+    return df
+
+
+def fit_pipeline(source, load=None, cache=None, profiler=None):
+    """Load → Select → Clean → Topic → Buckets → Interactions → Encode → Prepare.
+
+    load(source) reads the raw frame; without load, source is the raw frame.
+    With a StageCache, stages whose input, parameters and code are unchanged
+    are loaded from disk instead of rerun. With a StageProfiler, every stage
+    that runs is timed and memory-profiled.
+    Returns (df, fill_values, encoders, scaler).
+    """
+    run = cache.run if cache is not None else run_stages
+    measured = profiler.wrap if profiler is not None else (lambda name, func: func)
+    stages = [('load', load)] if load else []
+    stages += [('select', select_features), ('clean', clean_data)]
+    df = run([(name, measured(name, func), {}) for name, func in stages], source)
+    fill_values = fit_fill_values(df)  # filling leaves medians/modes unchanged
+    stages = [
+        ('topic', expand_topics),
+        ('buckets', add_feature_buckets),
+        ('interactions', add_interaction_features),
+        ('encode', encode_and_normalize),
+    ]
+    df, encoders, scaler = run([(name, measured(name, func), {}) for name, func in stages], df)
+    df = measured('prepare', prepare_for_ml)(df)
+    return df, fill_values, encoders, scaler
+
+
+def model_columns(encoders):
+    """Model column order produced by prepare_for_ml for a set of encoders (target excluded)."""
+    categorical = [c for c in encoders if c not in BUCKET_SPECS]
+    return ([c + '_encoded' for c in categorical]
+            + [c + '_encoded' for c in BUCKET_COLUMNS if c in encoders]
+            + NUMERICAL_COLS + BUCKET_COLUMNS + list(INTERACTIONS))
+
+
+def _nearest_code(index, value):
+    """Code of the closest known bucket when a bucket id was never seen in training."""
+    closest = min((int(c) for c in index), key=lambda c: abs(c - value))
+    return index[str(closest)]
+
+
+class FeatureTransform:
+    """Fitted, serializable feature transform.
+
+    Holds only plain data (fill values, vocabularies, scaler moments and the
+    model column order), so it saves as JSON or a pickle without sklearn
+    objects and the single-row path runs without pandas. Vocabularies are
+    plain dicts, and unseen bucket ids map to a precomputed nearest bucket.
+    """
+
+    def __init__(self, fill_values, vocabularies, scaler_mean, scaler_scale, feature_columns):
+        self.fill_values = dict(fill_values)
+        self.vocabularies = {col: list(classes) for col, classes in vocabularies.items()}
+        self.scaler_mean = dict(scaler_mean)
+        self.scaler_scale = dict(scaler_scale)
+        self.feature_columns = list(feature_columns)
+        self._index = {col: {v: i for i, v in enumerate(classes)}
+                       for col, classes in self.vocabularies.items()}
+        self._fallback = {col: self._bucket_fallback(col) for col in self.vocabularies if col in BUCKET_SPECS}
+
+    def _bucket_fallback(self, col):
+        """Code of the closest known bucket for every bucket id missing from the vocabulary."""
+        index = self._index[col]
+        if not index:
+            return {}
+        n_ids = len(BUCKET_SPECS[col][1]) + 1
+        return {str(i): _nearest_code(index, i) for i in range(n_ids) if str(i) not in index}
+
+    @classmethod
+    def from_fitted(cls, fill_values, encoders, scaler, feature_columns):
+        """Build from the artifacts of a training run (encoders, scaler, output columns)."""
+        numerical = list(getattr(scaler, 'feature_names_in_', NUMERICAL_COLS))
+        return cls(
+            fill_values,
+            {col: [str(c) for c in le.classes_] for col, le in encoders.items()},
+            dict(zip(numerical, (float(m) for m in scaler.mean_))),
+            dict(zip(numerical, (float(s) for s in scaler.scale_))),
+            [c for c in feature_columns if c != TARGET],
+        )
+
+    @classmethod
+    def from_encoders(cls, encoders, scaler=None):
+        """Build from a legacy encoders.pkl when no fitted transform was saved.
+
+        Missing categoricals fall back to the first known class, missing
+        numericals to 0.0, and numericals are left unscaled without a scaler.
+        """
+        fill_values = {col: str(le.classes_[0]) for col, le in encoders.items() if col not in BUCKET_SPECS}
+        fill_values.update({col: 0.0 for col in NUMERICAL_COLS})
+        mean = {col: 0.0 for col in NUMERICAL_COLS}
+        scale = {col: 1.0 for col in NUMERICAL_COLS}
+        if scaler is not None:
+            mean = dict(zip(NUMERICAL_COLS, (float(m) for m in scaler.mean_)))
+            scale = dict(zip(NUMERICAL_COLS, (float(s) for s in scaler.scale_)))
+        vocabularies = {col: [str(c) for c in le.classes_] for col, le in encoders.items()}
+        return cls(fill_values, vocabularies, mean, scale, model_columns(encoders))
+
+    def to_dict(self):
+        """Plain-python representation (used for serialization)."""
+        return {
+            'fill_values': self.fill_values,
+            'vocabularies': self.vocabularies,
+            'scaler_mean': self.scaler_mean,
+            'scaler_scale': self.scaler_scale,
+            'feature_columns': self.feature_columns,
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        return cls(state['fill_values'], state['vocabularies'], state['scaler_mean'],
+                   state['scaler_scale'], state['feature_columns'])
+
+    def to_json(self):
+        state = self.to_dict()
+        state['fill_values'] = {col: v.item() if isinstance(v, np.generic) else v
+                                for col, v in state['fill_values'].items()}
+        return json.dumps(state, indent=2)
+
+    @classmethod
+    def from_json(cls, text):
+        return cls.from_dict(json.loads(text))
+
+    def save(self, path):
+        """Save as JSON for a .json path, otherwise as a pickled dict."""
+        if path.endswith('.json'):
+            with open(path, 'w') as f:
+                f.write(self.to_json())
+        else:
+            with open(path, 'wb') as f:
+                pickle.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path):
+        if path.endswith('.json'):
+            with open(path) as f:
+                return cls.from_json(f.read())
+        with open(path, 'rb') as f:
+            return cls.from_dict(pickle.load(f))
+
+    def label_encoders(self):
+        """Equivalent sklearn LabelEncoders (the encoders.pkl format)."""
+        from sklearn.preprocessing import LabelEncoder
+        encoders = {}
+        for col, classes in self.vocabularies.items():
+            le = LabelEncoder()
+            le.classes_ = np.array(classes, dtype=object)
+            encoders[col] = le
+        return encoders
+
+    @property
+    def input_columns(self):
+        return [c for c in RAW_FEATURES if c in self.fill_values or c in self.vocabularies]
+
+    def _encode(self, col, value):
+        code = self._index[col].get(value)
+        if code is None:
+            code = self._fallback.get(col, {}).get(value)
+        if code is None:
+            raise ValueError(f"y contains previously unseen labels: {value!r} ({col})")
+        return code
+
+    def _extend(self, col, values):
+        """Append unseen labels (sorted among themselves) after the known classes."""
+        index = self._index[col]
+        new = sorted(set(v for v in values if v not in index))
+        for v in new:
+            index[v] = len(self.vocabularies[col])
+            self.vocabularies[col].append(v)
+        if new and col in BUCKET_SPECS:
+            self._fallback[col] = self._bucket_fallback(col)
+        return new
+
+    def transform_one(self, row):
+        """Transform a single raw input dict into a (1, n_features) array, without pandas.
+
+        Topic values that are already known categories are used as-is (the
+        apps offer the fitted vocabulary); anything else is expanded first.
+        """
+        values = {}
+        for col in self.input_columns:
+            val = row.get(col)
+            if val is None or val != val:
+                val = self.fill_values[col]
+            values[col] = val
+
+        topic = values.get('topic_category')
+        if topic is not None and topic not in self._index.get('topic_category', ()):
+            values['topic_category'] = expand_topic_category(topic)
+
+        for col in NUMERICAL_COLS:
+            values[col] = float(values[col])
+        values.update(bucket_row(values))
+        for col_name, calc in INTERACTIONS.items():
+            values[col_name] = calc(values)
+
+        for col in self.vocabularies:
+            values[col + '_encoded'] = self._encode(col, str(values[col]))
+        for col in NUMERICAL_COLS:
+            values[col] = (values[col] - self.scaler_mean[col]) / self.scaler_scale[col]
+
+        return np.array([[values[c] for c in self.feature_columns]], dtype=np.float64)
+
+    def transform_batch(self, X):
+        """Vectorized transform of raw rows (DataFrame, or ndarray in input_columns order)."""
+        if isinstance(X, np.ndarray):
+            X = pd.DataFrame(X, columns=self.input_columns)
+        return self.transform_frame(X).to_numpy(dtype=np.float64)
+
+    def transform_frame(self, X, extend_vocabularies=False):
+        """Vectorized transform of a raw DataFrame into model columns (training dtypes kept).
+
+        With extend_vocabularies, labels never seen before are appended to the
+        end of their vocabulary instead of raising, so existing codes never change.
+        """
+        df = X[[c for c in self.input_columns if c in X.columns]].copy()
+        for col in self.input_columns:
+            if col not in df.columns:
+                df[col] = self.fill_values[col]
+        for col in NUMERICAL_COLS:
+            df[col] = pd.to_numeric(df[col]).astype(np.float64)
+        for col, val in self.fill_values.items():
+            if col in df.columns and df[col].isnull().any():
+                if isinstance(df[col].dtype, CategoricalDtype) and val not in df[col].cat.categories:
+                    df[col] = df[col].cat.add_categories([val])
+                df[col] = df[col].fillna(val)
+
+        df['topic_category'] = classify_topics(df['topic_category'])
+        df = add_feature_buckets(df)
+        df = add_interaction_features(df)
+
+        for col, classes in self.vocabularies.items():
+            if extend_vocabularies:
+                self._extend(col, df[col].astype(str).unique())
+            codes = pd.Categorical(df[col].astype(str), categories=classes).codes.astype(np.int64)
+            unseen = codes < 0
+            if unseen.any():
+                if col not in BUCKET_SPECS:
+                    raise ValueError(f"y contains previously unseen labels: {sorted(set(df.loc[unseen, col]))} ({col})")
+                fallback = self._fallback[col]
+                codes[unseen] = [fallback[str(v)] for v in df.loc[unseen, col]]
+            df[col + '_encoded'] = codes
+        for col in NUMERICAL_COLS:
+            df[col] = (df[col] - self.scaler_mean[col]) / self.scaler_scale[col]
+
+        return df[self.feature_columns]
+
+
+def load_feature_transform(directory="data/processed", name="feature_transform"):
+    """Fitted transform from directory: the JSON artifact, else its pickle, else a legacy encoders.pkl."""
+    for ext in ('.json', '.pkl'):
+        path = os.path.join(directory, name + ext)
+        if os.path.exists(path):
+            return FeatureTransform.load(path)
+    # Only this legacy path unpickles sklearn objects
+    with open(os.path.join(directory, "encoders.pkl"), 'rb') as f:
+        return FeatureTransform.from_encoders(pickle.load(f))
@@ -5,6 +5,7 @@ Generate predictions.csv for Power BI Dashboard
 import pandas as pd
 import pickle
 import numpy as np
+from columnar_store import load_cleaned_data
 
 print("📊 Generating predictions.csv for Power BI...")
 
@@ -12,7 +13,7 @@ print("📊 Generating predictions.csv for Power BI...")
 with open("models/model_gb.pkl", "rb") as f:
     model = pickle.load(f)
 
-df = pd.read_csv("data/processed/cleaned_data.csv")
+df = load_cleaned_data("data/processed/cleaned_data.csv")
 
 # Split features and target
 X = df.drop('engagement_rate', axis=1)
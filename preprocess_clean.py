@@ -6,178 +6,223 @@ Load → Clean → Encode → Prepare features for ML
 import pandas as pd
 import numpy as np
 import os
-from sklearn.preprocessing import LabelEncoder, StandardScaler
 import pickle
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import reduce
+from sklearn.preprocessing import StandardScaler
+from feature_transform import (
+    FeatureTransform, select_features, fit_pipeline, model_columns, read_raw_csv,
+    NUMERICAL_COLS, TARGET
+)
+from stage_cache import StageCache
+from stage_profile import StageProfiler
+import arrow_backend
+from streaming_stats import FitStatistics
+from columnar_store import ColumnarWriter, save_columnar, append_columnar, compact_dtypes, SCHEMA_FILE
 
 OUTPUT_DIR = "data/processed"
-
-
-def expand_topic_category(raw: str) -> str:
-    """Map coarse topic labels to a richer set of categories."""
-    if not isinstance(raw, str):
-        return "general"
-    text = raw.lower()
-
-    rules = [
-        ("technology", ["tech", "ai", "software", "product", "saas", "cloud", "data"]),
-        ("marketing", ["marketing", "brand", "ad", "campaign", "social", "content"]),
-        ("education", ["learn", "course", "study", "tutorial", "guide", "lesson"]),
-        ("business", ["business", "revenue", "sales", "clients", "startup", "founder", "b2b", "b2c"]),
-        ("finance", ["finance", "invest", "investment", "crypto", "stock", "bank", "budget"]),
-        ("health", ["health", "medical", "wellbeing", "wellness", "mental", "fitness", "care"]),
-        ("lifestyle", ["lifestyle", "travel", "food", "life", "family", "home"]),
-        ("entertainment", ["entertainment", "movie", "film", "music", "show", "game", "gaming"]),
-        ("sports", ["sports", "football", "soccer", "basketball", "tennis", "run", "workout"]),
-        ("news", ["news", "update", "breaking", "trending", "headline"]),
-        ("career", ["career", "job", "hiring", "interview", "resume", "cv", "promotion"]),
-        ("productivity", ["productivity", "workflow", "automation", "process", "time management"]),
-        ("design", ["design", "ux", "ui", "graphic", "creative"]),
-        ("engineering", ["engineering", "code", "developer", "dev", "program", "build"]),
-        ("motivation", ["motivation", "inspiration", "mindset", "success", "discipline"]),
-    ]
-
-    for label, keywords in rules:
-        if any(k in text for k in keywords):
-            return label
-
-    return text if text else "general"
+CLEANED_CSV = f"{OUTPUT_DIR}/cleaned_data.csv"
+CLEANED_COLUMNAR = f"{OUTPUT_DIR}/cleaned_data_columnar"
+PROFILE_REPORT = f"{OUTPUT_DIR}/preprocess_profile.json"
 
 
 def load_data(filepath):
-    """Load dataset from CSV."""
+    """Load the pre-posting feature columns of the raw CSV with declared dtypes."""
     print("📂 Loading dataset...")
-    df = pd.read_csv(filepath)
+    df = read_raw_csv(filepath)
     print(f"✅ Loaded: {len(df)} rows, {len(df.columns)} columns")
     return df
 
 
-def select_features(df):
-    """Keep only pre-posting features (data known BEFORE publishing)."""
-    print("\n📋 Selecting pre-posting features...")
-    
-    features = [
-        'day_of_week', 'platform', 'topic_category', 'sentiment_score',
-        'emotion_type', 'toxicity_score', 'user_past_sentiment_avg',
-        'user_engagement_growth', 'location', 'language', 'engagement_rate'  # target
-    ]
-    
-    # Filter to available columns
-    features = [f for f in features if f in df.columns]
-    df = df[features].copy()
-    
-    print(f"✅ Selected {len(features)-1} features + 1 target")
-    return df
+# In-memory pipeline engines: backend -> (loader, fit_pipeline)
+BACKENDS = {
+    'pandas': (load_data, fit_pipeline),
+    'arrow': (arrow_backend.read_table, arrow_backend.fit_pipeline),
+}
 
 
-def add_feature_buckets(df):
-    """Add coarse buckets to help tree/boosting models capture non-linearities."""
-    def bucketize(val, cuts):
-        for i, c in enumerate(cuts):
-            if val <= c:
-                return i
-        return len(cuts)
-
-    # Bucket definitions (feature, thresholds)
-    bucket_specs = {
-        'sentiment_bucket': (df['sentiment_score'], [-0.4, -0.1, 0.1, 0.4]),
-        'toxicity_bucket': (df['toxicity_score'], [0.2, 0.4, 0.6, 0.8]),
-        'past_perf_bucket': (df['user_past_sentiment_avg'], [-0.2, 0.0, 0.2, 0.5]),
-        'growth_bucket': (df['user_engagement_growth'], [-0.2, 0.0, 0.2, 0.5])
-    }
-    
-    # Apply bucketing efficiently
-    for col_name, (series, cuts) in bucket_specs.items():
-        df[col_name] = series.apply(lambda v: bucketize(v, cuts))
-    
-    return df
+def iter_selected_chunks(filepath, chunksize):
+    """Yield raw CSV chunks reduced to pre-posting features, sparse rows dropped."""
+    for chunk in read_raw_csv(filepath, chunksize=chunksize):
+        # Drop rows with >30% missing (same rule as clean_data)
+        yield chunk.dropna(thresh=len(chunk.columns) * 0.7)
 
 
-def add_interaction_features(df):
-    """Engineer interaction and transformed features for better predictive power."""
-    interactions = {
-        'sentiment_toxicity_interaction': lambda: df['sentiment_score'] * df['toxicity_score'],
-        'abs_sentiment': lambda: df['sentiment_score'].abs(),
-        'perf_momentum': lambda: df['user_past_sentiment_avg'] * df['user_engagement_growth'],
-        'toxicity_squared': lambda: df['toxicity_score'] ** 2,
-        'sentiment_squared': lambda: df['sentiment_score'] ** 2
-    }
-    
-    for col_name, calc in interactions.items():
-        df[col_name] = calc()
-    
-    return df
+def save_artifacts(encoders, transform, outputs):
+    """Save fitted encoders + transform and report every written file."""
+    with open(f"{OUTPUT_DIR}/encoders.pkl", 'wb') as f:
+        pickle.dump(encoders, f)
+    transform.save(f"{OUTPUT_DIR}/feature_transform.pkl")
+    # Compact JSON vocabulary artifact: loads without sklearn or pickle
+    transform.save(f"{OUTPUT_DIR}/feature_transform.json")
 
+    print()
+    artifacts = ["encoders.pkl", "feature_transform.pkl", "feature_transform.json"]
+    for path in outputs + [f"{OUTPUT_DIR}/{name}" for name in artifacts]:
+        print(f"💾 Saved: {path}")
+    print("\n✅ PREPROCESSING COMPLETE!")
 
-def clean_data(df):
-    """Remove missing values and fill remaining ones."""
-    print("\n🔍 Cleaning data...")
-    
-    # Drop rows with >30% missing
+
+def preprocess_streaming(input_file, chunksize=100_000, export_csv=True):
+    """
+    Out-of-core preprocessing for raw CSVs larger than RAM:
+    1. Pass 1 - collect medians, modes, vocabularies and scaler moments per chunk
+    2. Pass 2 - transform each chunk with the fitted statistics and append it
+    Memory stays bounded by the chunk size. Output files match preprocess().
+    """
+    print("\n" + "="*60)
+    print("🔧 DATA PREPROCESSING (streaming)")
+    print("="*60)
+
+    print(f"\n📊 Pass 1/2: collecting statistics ({chunksize:,} rows per chunk)...")
+    stats = FitStatistics()
+    for chunk in iter_selected_chunks(input_file, chunksize):
+        stats.update(chunk)
+    fill_values, encoders, scaler = stats.finalize()
+    transform = FeatureTransform.from_fitted(fill_values, encoders, scaler, model_columns(encoders))
+    print(f"✅ Fitted on {stats.rows:,} rows" + ("" if stats.exact else " (approximate medians)"))
+
+    print("\n🔢 Pass 2/2: transforming chunks...")
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    columns = transform.feature_columns + [TARGET]
+    writer = ColumnarWriter(CLEANED_COLUMNAR, compact_dtypes(columns, encoders), stats.rows)
+    csv_file = open(CLEANED_CSV, 'w', newline='') if export_csv else None
+    rows = 0
+    for i, chunk in enumerate(iter_selected_chunks(input_file, chunksize)):
+        out = transform.transform_frame(chunk)
+        out[TARGET] = chunk[TARGET].fillna(fill_values[TARGET]).to_numpy()
+        writer.write(rows, out)
+        if csv_file:
+            out.to_csv(csv_file, header=(i == 0), index=False)
+        rows += len(out)
+    if csv_file:
+        csv_file.close()
+    writer.close()
+    print(f"✅ Final shape: ({rows}, {len(columns)})")
+
+    save_artifacts(encoders, transform, [CLEANED_COLUMNAR] + ([CLEANED_CSV] if export_csv else []))
+
+    return CLEANED_COLUMNAR, encoders, scaler
+
+
+def _fit_shard(shard):
+    """Map step: partial statistics for one shard (unbounded sketch, so medians stay exact)."""
+    return FitStatistics(max_bins=None).update(shard)
+
+
+def _transform_shard(args):
+    """Transform one shard; returns the frame and its CSV text so formatting runs in parallel too."""
+    state, shard, target_fill, header, export_csv = args
+    out = FeatureTransform.from_dict(state).transform_frame(shard)
+    out[TARGET] = shard[TARGET].fillna(target_fill).to_numpy()
+    return out, out.to_csv(header=header, index=False) if export_csv else None
+
+
+def preprocess_parallel(input_file, n_jobs=-1, export_csv=True):
+    """
+    Sharded multi-process preprocessing:
+    1. Map - each worker collects counts, medians, vocabularies for its shard
+    2. Reduce - partial statistics are merged into one fitted encoder/scaler set
+    3. Transform - shards are encoded, normalized and formatted in parallel
+    Output files are byte-identical to the serial preprocess().
+    """
+    n_jobs = os.cpu_count() if n_jobs in (None, -1) else n_jobs
+
+    print("\n" + "="*60)
+    print(f"🔧 DATA PREPROCESSING (parallel, {n_jobs} workers)")
+    print("="*60)
+
+    df = load_data(input_file)
+    df = select_features(df)
+    # Drop rows with >30% missing (same rule as clean_data)
     df = df.dropna(thresh=len(df.columns) * 0.7)
-    
-    # Fill numerical with median (avoid chained assignment warnings)
-    for col in df.select_dtypes(include=[np.number]).columns:
-        df[col] = df[col].fillna(df[col].median())
-
-    # Fill categorical with mode
-    for col in df.select_dtypes(include=['object']).columns:
-        if df[col].isnull().sum() > 0:
-            df[col] = df[col].fillna(df[col].mode()[0])
-    
-    print(f"✅ Missing values: {df.isnull().sum().sum()}")
-    return df
+    bounds = np.linspace(0, len(df), n_jobs + 1).astype(int)
+    shards = [df.iloc[a:b] for a, b in zip(bounds[:-1], bounds[1:])]
 
+    with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+        print("\n📊 Map: collecting shard statistics...")
+        stats = reduce(FitStatistics.merge, pool.map(_fit_shard, shards))
+        fill_values, encoders, _ = stats.finalize()
 
-def encode_and_normalize(df):
-    """Encode categoricals and normalize numericals."""
-    print("\n🔢 Encoding categorical features...")
-    
-    encoders = {}
-    categorical_cols = [c for c in df.columns 
-                       if df[c].dtype == 'object' and c != 'engagement_rate']
-    categorical_cols += [c for c in ['sentiment_bucket', 'toxicity_bucket', 'past_perf_bucket', 'growth_bucket'] if c in df.columns]
-    
-    for col in categorical_cols:
-        le = LabelEncoder()
-        df[col + '_encoded'] = le.fit_transform(df[col].astype(str))
-        encoders[col] = le
-    
-    print(f"✅ Encoded {len(categorical_cols)} categorical features")
-    
-    print("\n📏 Normalizing numerical features...")
-    numerical_cols = ['sentiment_score', 'toxicity_score',
-                     'user_past_sentiment_avg', 'user_engagement_growth']
-    numerical_cols = [c for c in numerical_cols if c in df.columns]
-    
-    scaler = StandardScaler()
-    df[numerical_cols] = scaler.fit_transform(df[numerical_cols])
-    
-    print(f"✅ Normalized {len(numerical_cols)} numerical features")
-    
-    return df, encoders, scaler
+        # StandardScaler sums each whole column pairwise, which shard-merged
+        # moments cannot reproduce bit-for-bit; one vectorized fit over the
+        # four filled numerical columns keeps the output identical to serial.
+        numerical = df[NUMERICAL_COLS].fillna({c: fill_values[c] for c in NUMERICAL_COLS})
+        scaler = StandardScaler().fit(numerical)
+        transform = FeatureTransform.from_fitted(fill_values, encoders, scaler, model_columns(encoders))
+        print(f"✅ Reduced {len(shards)} shards ({stats.rows:,} rows)")
 
+        print("\n🔢 Transforming shards...")
+        state = transform.to_dict()
+        jobs = [(state, shard, fill_values[TARGET], i == 0, export_csv) for i, shard in enumerate(shards)]
+        results = list(pool.map(_transform_shard, jobs))
 
-def prepare_for_ml(df):
-    """Keep only encoded + normalized features + target."""
-    print("\n🎯 Preparing for ML...")
-    
-    encoded = [c for c in df.columns if c.endswith('_encoded')]
-    numerical = ['sentiment_score', 'toxicity_score',
-                'user_past_sentiment_avg', 'user_engagement_growth']
-    numerical = [c for c in numerical if c in df.columns]
-    # Keep engineered buckets too
-    engineered = [c for c in ['sentiment_bucket', 'toxicity_bucket', 'past_perf_bucket', 'growth_bucket'] if c in df.columns]
-    # Keep interaction features (these are already normalized)
-    interactions = [c for c in df.columns if c in ['sentiment_toxicity_interaction', 'abs_sentiment', 'perf_momentum', 'toxicity_squared', 'sentiment_squared']]
-    
-    final_cols = encoded + numerical + engineered + interactions + ['engagement_rate']
-    df = df[final_cols].copy()
-    
+    df = pd.concat([out for out, _ in results], ignore_index=True)
     print(f"✅ Final shape: {df.shape}")
-    return df
 
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    if export_csv:
+        with open(CLEANED_CSV, 'w', newline='') as f:
+            for _, text in results:
+                f.write(text)
+    save_columnar(df, CLEANED_COLUMNAR, encoders)
+
+    save_artifacts(encoders, transform, [CLEANED_COLUMNAR] + ([CLEANED_CSV] if export_csv else []))
+
+    return df, encoders, scaler
+
+
+def preprocess_append(input_file, export_csv=True):
+    """
+    Incremental preprocessing of newly arrived raw rows:
+    1. Load the fitted encoders.pkl + feature_transform.pkl (nothing is refitted)
+    2. Transform only the new rows; unseen labels are appended to the
+       vocabularies, so existing codes never change
+    3. Append to the columnar store (and cleaned_data.csv) and re-save encoders
+    """
+    print("\n" + "="*60)
+    print("🔧 DATA PREPROCESSING (append)")
+    print("="*60)
+
+    transform_path = f"{OUTPUT_DIR}/feature_transform.pkl"
+    if not os.path.exists(transform_path):
+        raise FileNotFoundError(f"{transform_path} not found - run a full preprocess() first")
+    transform = FeatureTransform.load(transform_path)
+    with open(f"{OUTPUT_DIR}/encoders.pkl", 'rb') as f:
+        encoders = pickle.load(f)
+
+    df = load_data(input_file)
+    # Drop rows with >30% missing (same rule as clean_data)
+    df = df.dropna(thresh=len(df.columns) * 0.7)
+
+    print("\n🔢 Transforming new rows with the fitted encoders...")
+    sizes = {col: len(classes) for col, classes in transform.vocabularies.items()}
+    out = transform.transform_frame(df, extend_vocabularies=True)
+    out[TARGET] = df[TARGET].fillna(transform.fill_values[TARGET]).to_numpy()
+    for col, classes in transform.vocabularies.items():
+        if len(classes) > sizes[col]:
+            print(f"   ➕ {col}: {classes[sizes[col]:]}")
+        # Keep the LabelEncoders in step (object classes_ need not be sorted)
+        encoders[col].classes_ = np.array(classes, dtype=object)
+    print(f"✅ Transformed {len(out)} new rows")
+
+    if not os.path.exists(os.path.join(CLEANED_COLUMNAR, SCHEMA_FILE)):
+        # Store predates the columnar format: build it from the existing CSV once
+        save_columnar(pd.read_csv(CLEANED_CSV), CLEANED_COLUMNAR, encoders)
+    outputs = [CLEANED_COLUMNAR]
+    if export_csv and os.path.exists(CLEANED_CSV):
+        out.to_csv(CLEANED_CSV, mode='a', header=False, index=False)
+        outputs.append(CLEANED_CSV)
+    append_columnar(out, CLEANED_COLUMNAR, encoders)
 
-def preprocess(input_file="archive (1)/Social Media Engagement Dataset.csv"):
+    save_artifacts(encoders, transform, outputs)
+
+    return out, encoders, transform
+
+
+def preprocess(input_file="archive (1)/Social Media Engagement Dataset.csv", chunksize=None, n_jobs=1, export_csv=True,
+               append=False, cache=False, profile=False, trace_memory=False, backend='pandas'):
     """
     Complete preprocessing pipeline:
     1. Load data
@@ -186,34 +231,55 @@ def preprocess(input_file="archive (1)/Social Media Engagement Dataset.csv"):
     4. Encode categoricals
     5. Normalize numericals
     6. Prepare for ML
+    With chunksize set, runs out-of-core via preprocess_streaming() and
+    returns the columnar output path instead of the DataFrame. With n_jobs
+    other than 1, runs sharded across processes via preprocess_parallel().
+    With append, input_file holds only new rows, which preprocess_append()
+    transforms with the saved encoders and appends to the existing output.
+    With cache, unchanged stages are loaded from the stage cache (data/cache).
+    With profile, per-stage timings are written to preprocess_profile.json;
+    trace_memory adds per-stage peak memory (tracemalloc, slower).
+    backend picks the engine for the in-memory path: 'pandas' (default) or
+    'arrow' (pyarrow tables, dictionary-encoded strings; same output).
+    Output is the typed columnar store; export_csv also writes cleaned_data.csv.
     """
+    if append:
+        return preprocess_append(input_file, export_csv)
+    if chunksize:
+        return preprocess_streaming(input_file, chunksize, export_csv)
+    if n_jobs != 1:
+        return preprocess_parallel(input_file, n_jobs, export_csv)
+
     print("\n" + "="*60)
     print("🔧 DATA PREPROCESSING")
     print("="*60)
     
-    df = load_data(input_file)
-    df = select_features(df)
-    df = clean_data(df)
-    # Enrich topic granularity before encoding
-    df['topic_category'] = df['topic_category'].apply(expand_topic_category)
-    df = add_feature_buckets(df)
-    df = add_interaction_features(df)
-    df, encoders, scaler = encode_and_normalize(df)
-    df = prepare_for_ml(df)
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend!r}, expected one of {sorted(BACKENDS)}")
+    load, pipeline = BACKENDS[backend]
+    stage_cache = StageCache.for_file(input_file) if cache else None
+    profiler = StageProfiler(trace_memory) if profile or trace_memory else None
+    df, fill_values, encoders, scaler = pipeline(input_file, load, stage_cache, profiler)
+    transform = FeatureTransform.from_fitted(fill_values, encoders, scaler, df.columns)
     
     # Save
     os.makedirs(OUTPUT_DIR, exist_ok=True)
-    df.to_csv(f"{OUTPUT_DIR}/cleaned_data.csv", index=False)
+    if export_csv:
+        df.to_csv(CLEANED_CSV, index=False)
+    save_columnar(df, CLEANED_COLUMNAR, encoders)
     
-    with open(f"{OUTPUT_DIR}/encoders.pkl", 'wb') as f:
-        pickle.dump(encoders, f)
-    
-    print(f"\n💾 Saved: {OUTPUT_DIR}/cleaned_data.csv")
-    print(f"💾 Saved: {OUTPUT_DIR}/encoders.pkl")
-    print("\n✅ PREPROCESSING COMPLETE!")
+    outputs = [CLEANED_COLUMNAR] + ([CLEANED_CSV] if export_csv else [])
+    if profiler:
+        outputs.append(profiler.save(PROFILE_REPORT, input=input_file, backend=backend, rows=len(df),
+                                     cached_stages=stage_cache.skipped if stage_cache else []))
+    save_artifacts(encoders, transform, outputs)
     
     return df, encoders, scaler
 
 
 if __name__ == "__main__":
-    df, enc, scaler = preprocess()
+    # --cache: reuse unchanged stages from data/cache (hashes the raw export, pickles each stage)
+    # --profile: write preprocess_profile.json; --trace-memory: with per-stage peak memory
+    args = sys.argv[1:]
+    df, enc, scaler = preprocess(cache="--cache" in args, profile="--profile" in args,
+                                 trace_memory="--trace-memory" in args)
@@ -0,0 +1,217 @@
+"""
+SEARCH CLUSTER - Hand hyperparameter search trials to worker processes
+The Coordinator listens on a TCP address; workers on this or other hosts
+connect to it and register. The SearchScheduler sends each trial
+(estimator, params, fold rows) to an idle worker, which fits it on its own
+cores and sends back the fold scores. The training data goes to each worker
+once per search, trials then carry only row positions. Trials of a worker
+that disconnects are re-run locally; with no workers registered the
+scheduler runs everything locally.
+Messages are pickles over multiprocessing.connection, authenticated with
+SEARCH_AUTHKEY on both ends: only run workers on networks you trust.
+Usage (worker): python search_cluster.py <coordinator host:port> [threads]
+"""
+
+import os
+import queue
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Listener, Client
+
+import numpy as np
+from search_scheduler import available_cores, run_trial
+
+SEARCH_COORDINATOR = os.getenv("SEARCH_COORDINATOR")  # host:port the coordinator listens on
+CONNECT_RETRY_SECONDS = 2
+
+
+class WorkerLost(ConnectionError):
+    """A worker disconnected before returning a trial."""
+
+
+def parse_address(address):
+    """('host', port) from 'host:port'."""
+    host, _, port = address.rpartition(':')
+    return host or '0.0.0.0', int(port)
+
+
+def _authkey(authkey):
+    authkey = authkey or os.getenv("SEARCH_AUTHKEY")
+    if not authkey:
+        raise ValueError("Set SEARCH_AUTHKEY (shared by the coordinator and its workers)")
+    return authkey.encode() if isinstance(authkey, str) else authkey
+
+
+class Coordinator:
+    """Accepts workers and runs submitted trials on them, one trial per worker at a time."""
+
+    def __init__(self, address=None, authkey=None):
+        address = address or parse_address(SEARCH_COORDINATOR or '127.0.0.1:0')
+        self.listener = Listener(address, authkey=_authkey(authkey))
+        self.address = self.listener.address
+        self._tasks = queue.Queue()
+        self._data = {}
+        self._names = []
+        self._inflight = 0
+        self._lock = threading.Lock()
+        self._closed = False
+        threading.Thread(target=self._accept, daemon=True).start()
+        print(f"🛰️  Search coordinator listening on {self.address[0]}:{self.address[1]}")
+
+    @property
+    def workers(self):
+        """Number of connected workers."""
+        with self._lock:
+            return len(self._names)
+
+    def idle(self):
+        """Connected workers without a trial."""
+        with self._lock:
+            return max(0, len(self._names) - self._inflight)
+
+    def share(self, key, X, y):
+        """Make the training data available to workers under key (sent on first use)."""
+        self._data[key] = (X, y)
+
+    def submit(self, key, payload):
+        """Queue a trial on the data shared under key; returns a Future of its results."""
+        future = Future()
+        with self._lock:
+            self._inflight += 1
+        future.add_done_callback(self._finished)
+        self._tasks.put((future, key, payload))
+        if not self.workers:  # the last worker left since the caller checked idle()
+            self._drain()
+        return future
+
+    def _finished(self, _):
+        with self._lock:
+            self._inflight -= 1
+
+    def _accept(self):
+        while not self._closed:
+            try:
+                conn = self.listener.accept()
+            except (AuthenticationError, ConnectionError, EOFError) as e:
+                # Failed handshakes (wrong authkey, dropped clients, port scans) do not stop it
+                print(f"   ⚠️  Refused connection: {type(e).__name__}: {e}")
+                continue
+            except OSError as e:
+                if not self._closed:
+                    print(f"   ❌ Coordinator stopped accepting workers: {e}")
+                return
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn):
+        try:
+            _, host, threads = conn.recv()
+        except Exception:
+            conn.close()
+            return
+        name = f"{host}/{threads} threads"
+        with self._lock:
+            self._names.append(name)
+        print(f"   🛰️  Worker joined: {name}")
+        sent = set()
+        try:
+            while True:
+                item = self._tasks.get()
+                if item is None:
+                    conn.send(('stop',))
+                    return
+                future, key, payload = item
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    if key not in sent:
+                        conn.send(('data', key, self._data[key]))
+                        sent.add(key)
+                    conn.send(('trial', key, payload))
+                    future.set_result(conn.recv())
+                except (EOFError, OSError) as e:
+                    future.set_exception(WorkerLost(f"worker {name} disconnected: {e}"))
+                    return
+                except Exception as e:
+                    future.set_exception(e)
+        finally:
+            conn.close()
+            with self._lock:
+                self._names.remove(name)
+                last = not self._names
+            print(f"   🛰️  Worker left: {name}")
+            if last:
+                self._drain()
+
+    def _drain(self):
+        """Fail queued trials nobody is left to run, so the scheduler re-runs them locally."""
+        while True:
+            try:
+                item = self._tasks.get_nowait()
+            except queue.Empty:
+                return
+            if item is not None and item[0].set_running_or_notify_cancel():
+                item[0].set_exception(WorkerLost("no workers left"))
+
+    def close(self):
+        """Stop the connected workers and the listener."""
+        self._closed = True
+        for _ in range(self.workers):
+            self._tasks.put(None)
+        self.listener.close()
+
+
+def _connect(address, authkey):
+    while True:
+        try:
+            return Client(address, authkey=authkey)
+        except ConnectionRefusedError:
+            time.sleep(CONNECT_RETRY_SECONDS)
+
+
+def run_worker(address, authkey=None, threads=None):
+    """Connect to a coordinator (retrying until it is up) and run its trials until it stops."""
+    threads = threads or available_cores()
+    conn = _connect(address, _authkey(authkey))
+    conn.send(('hello', socket.gethostname(), threads))
+    print(f"🛰️  Worker connected to {address[0]}:{address[1]} ({threads} threads)")
+    data = {}
+    trials = 0
+    try:
+        while True:
+            try:
+                message = conn.recv()
+            except EOFError:
+                break
+            if message[0] == 'stop':
+                break
+            if message[0] == 'data':
+                data[message[1]] = message[2]
+                continue
+            _, key, task = message
+            X, y = data[key]
+            tr, te = task['train'], task['test']
+            try:
+                results = run_trial(task['estimator'], task['params'], threads,
+                                    X.iloc[tr], y.iloc[tr], X.iloc[te], y.iloc[te],
+                                    task['early_stopping'], task['budget_param'],
+                                    task['checkpoints'])
+            except Exception as e:
+                print(f"   ⚠️  {type(task['estimator']).__name__} trial failed: {e}")
+                results = [(np.nan, np.nan)] * len(task['checkpoints'] or [None])
+            conn.send(results)
+            trials += 1
+    finally:
+        conn.close()
+    print(f"✅ Worker done: {trials} trials")
+    return trials
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if not args:
+        sys.exit(__doc__)
+    run_worker(parse_address(args[0]), threads=int(args[1]) if len(args) > 1 else None)
@@ -0,0 +1,698 @@
+"""
+SEARCH SCHEDULER - Concurrent hyperparameter search under one core budget
+Expands each model family's randomized search into single (candidate, fold)
+fits and runs the fits of every family side by side. Each fit gets an
+explicit thread count (n_jobs / OpenMP threads) out of a global core budget,
+so the machine stays busy without nested over-parallelism: one thread per
+fit while plenty are queued, more threads per fit as the queue drains.
+The estimators' own n_jobs only applies to prediction with the returned models.
+
+mode='full': every candidate at full budget. For plain families,
+candidates, folds, scores and the refit best estimator match
+RandomizedSearchCV(n_iter, cv, scoring="neg_mean_absolute_error",
+random_state). warm_start and early_stopping families do not (see below).
+mode='halving': successive halving. Every candidate is scored on a small
+budget (a fraction of the trees / boosting rounds and of the training rows
+of each fold); the best 1/factor move up to the next rung with factor
+times the budget, and the last rung runs at full budget.
+warm_start families (forests): the tree-count list is a set of checkpoints.
+One forest per remaining parameter combination and fold is grown through
+them with warm_start and scored at each, so all tree counts cost one fit at
+the largest count. The candidates are ceil(n_iter / tree counts) sampled
+combinations crossed with every tree count: a different candidate set from
+RandomizedSearchCV's n_iter samples, so results are not comparable to it.
+early_stopping families (boosting): each fold fit holds out part of its
+training rows and stops once validation MAE has not improved for that many
+rounds. The chosen params carry the early-stopped round count (mean over the
+final folds) and the refit builds exactly that many rounds.
+prebin families (boosting): each fold's training rows are quantized once
+per bin setting (an XGBoost QuantileDMatrix, HistGradientBoosting bin codes)
+and shared by every trial with that setting; build time is reported apart.
+store (a TrialStore): fold scores are read from and written to a SQLite
+trial store keyed by a data fingerprint, so reruns skip scored trials and
+an interrupted search resumes where it stopped.
+cluster (a search_cluster.Coordinator): trials also go to remote workers
+whenever one is idle; with no workers registered everything runs locally.
+"""
+
+import math
+from itertools import islice
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import numpy as np
+from sklearn.base import clone
+from sklearn.metrics import mean_absolute_error
+from sklearn.model_selection import KFold, ParameterSampler, train_test_split
+from sklearn.utils import check_random_state
+from threadpoolctl import threadpool_limits
+from trial_store import data_fingerprint
+
+try:
+    import xgboost as xgb
+    XGBOOST_AVAILABLE = True
+except ImportError:
+    XGBOOST_AVAILABLE = False
+
+try:
+    # Private, but it is the binning HistGradientBoosting runs on every fit
+    from sklearn.ensemble._hist_gradient_boosting.binning import _BinMapper
+    BIN_MAPPER_AVAILABLE = True
+except ImportError:
+    BIN_MAPPER_AVAILABLE = False
+
+SEARCH_MODES = ('full', 'halving')
+MIN_ROUNDS = 10   # smallest tree / boosting-round count on a reduced budget
+MIN_ROWS = 200    # smallest training subset on a reduced budget
+VALIDATION_FRACTION = 0.1  # share of a fold's training rows held out for early stopping
+
+
+def available_cores():
+    """Cores this process may run on."""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _early_stopping_params(estimator, rounds):
+    """Params that stop boosting after `rounds` rounds without validation MAE
+    improvement (rounds=None turns early stopping off)."""
+    params = estimator.get_params()
+    if 'early_stopping_rounds' in params:  # XGBoost
+        return {'early_stopping_rounds': rounds, 'eval_metric': 'mae' if rounds else None}
+    if 'n_iter_no_change' in params:  # HistGradientBoosting
+        if not rounds:
+            return {'early_stopping': False}
+        return {'early_stopping': True, 'n_iter_no_change': rounds,
+                'validation_fraction': VALIDATION_FRACTION, 'scoring': 'neg_mean_absolute_error'}
+    raise ValueError(f"{type(estimator).__name__} does not support early stopping")
+
+
+def _stopped_rounds(model):
+    """Rounds up to the best validation score of an early-stopped fit."""
+    if hasattr(model, 'validation_score_'):
+        # HistGradientBoosting keeps its trailing rounds; entry 0 is the initial prediction
+        return max(1, int(np.argmax(model.validation_score_)))
+    return int(model.best_iteration) + 1
+
+
+def _predict(model, X, stopped=np.nan):
+    """Predictions of an early-stopped fit, truncated to its stopped round count.
+
+    HistGradientBoosting keeps the trailing n_iter_no_change rounds, so its
+    fold score would not be that of the refit; XGBoost already predicts with
+    best_iteration.
+    """
+    if stopped == stopped and hasattr(model, 'validation_score_'):
+        return next(islice(model.staged_predict(X), int(stopped) - 1, None))
+    return model.predict(X)
+
+
+def _fit(estimator, params, threads, X, y, early_stopping=None):
+    """Clone, configure and fit estimator with exactly `threads` threads.
+
+    The fitted model gets the estimator's own n_jobs back, so prediction
+    behaves as if the model had been fitted directly. early_stopping: see
+    _early_stopping_params (XGBoost gets a held-out eval_set here).
+    """
+    model = clone(estimator).set_params(**params)
+    fit_params = {}
+    if early_stopping:
+        model.set_params(**_early_stopping_params(model, early_stopping))
+        if 'early_stopping_rounds' in model.get_params():
+            X, X_val, y, y_val = train_test_split(X, y, test_size=VALIDATION_FRACTION,
+                                                  random_state=42)
+            fit_params = {'eval_set': [(X_val, y_val)], 'verbose': False}
+    has_jobs = 'n_jobs' in model.get_params()
+    if has_jobs:
+        model.set_params(n_jobs=threads)
+    with threadpool_limits(limits=threads, user_api='openmp'):
+        model.fit(X, y, **fit_params)
+    if has_jobs:
+        model.set_params(n_jobs=estimator.get_params()['n_jobs'])
+    return model
+
+
+def _bin_setting(model):
+    """(library, bin count) when fits of model can share pre-binned data, else None."""
+    params = model.get_params()
+    if XGBOOST_AVAILABLE and isinstance(model, xgb.XGBModel):
+        if params.get('tree_method') in (None, 'hist') and params.get('device') in (None, 'cpu'):
+            return ('xgboost', params.get('max_bin') or 256)
+        return None
+    if BIN_MAPPER_AVAILABLE and 'max_bins' in params and params.get('categorical_features') is None:
+        return ('hist', params['max_bins'])
+    return None
+
+
+def _build_bins(setting, X, y, X_test, early_stopping, random_state, threads):
+    """Quantized training data for one bin setting, as the library's own fit would build it."""
+    library, n_bins = setting
+    if library == 'xgboost':
+        evals = []
+        if early_stopping:
+            # Same held-out split as _fit
+            X, X_val, y, y_val = train_test_split(X, y, test_size=VALIDATION_FRACTION,
+                                                  random_state=42)
+        train = xgb.QuantileDMatrix(X, y, max_bin=n_bins, nthread=threads)
+        if early_stopping:
+            val = xgb.QuantileDMatrix(X_val, y_val, ref=train, nthread=threads)
+            evals = [(val, 'validation_0')]
+        return {'library': library, 'train': train, 'evals': evals, 'test': X_test}
+
+    seed = check_random_state(random_state).randint(np.iinfo(np.uint32).max, dtype='u8')
+    mapper = _BinMapper(n_bins=n_bins + 1, random_state=seed, n_threads=threads)
+
+    def codes(frame):
+        values = frame.to_numpy(dtype=np.float64)
+        binned = mapper.transform(values).astype(np.float64)
+        binned[np.isnan(values)] = np.nan  # keep missing values missing
+        return binned
+    fit_rows = X
+    if early_stopping:
+        # HistGradientBoosting bins only the rows left after its own validation split
+        fit_rows, _ = train_test_split(X, test_size=VALIDATION_FRACTION, random_state=seed)
+    mapper.fit(fit_rows.to_numpy(dtype=np.float64))
+    return {'library': library, 'train': codes(X), 'y': y, 'test': codes(X_test)}
+
+
+class _SharedBins:
+    """Pre-binned fold of one bin setting, built by the first trial that needs it.
+
+    Trials run on pool threads; concurrent trials on the same fold wait for
+    that one build instead of quantizing the rows again.
+    """
+
+    def __init__(self, family, setting, X, y, X_test, early_stopping, random_state):
+        self.family = family  # charged with the build time
+        self.setting = setting
+        self._args = (X, y, X_test, early_stopping, random_state)
+        self._lock = threading.Lock()
+        self._binned = None
+        self.seconds = 0.0
+
+    @property
+    def built(self):
+        return self._binned is not None
+
+    def get(self, threads):
+        with self._lock:
+            if self._binned is None:
+                start = time.perf_counter()
+                self._binned = _build_bins(self.setting, *self._args, threads)
+                self.seconds = time.perf_counter() - start
+        return self._binned
+
+
+def _fit_binned(estimator, params, threads, binned, early_stopping=None):
+    """Fit on pre-binned data; returns (test predictions, early-stopped rounds or NaN).
+
+    Predictions equal those of _fit on the raw rows.
+    """
+    model = clone(estimator).set_params(**params)
+    if early_stopping:
+        model.set_params(**_early_stopping_params(model, early_stopping))
+    with threadpool_limits(limits=threads, user_api='openmp'):
+        if binned['library'] == 'xgboost':
+            model.set_params(n_jobs=threads)
+            booster = xgb.train(model.get_xgb_params(), binned['train'],
+                                num_boost_round=model.get_num_boosting_rounds(),
+                                evals=binned['evals'], early_stopping_rounds=early_stopping,
+                                verbose_eval=False)
+            if not early_stopping:
+                return booster.inplace_predict(binned['test']), np.nan
+            stopped = booster.best_iteration + 1
+            return booster.inplace_predict(binned['test'], iteration_range=(0, stopped)), stopped
+        model.fit(binned['train'], binned['y'])
+        stopped = _stopped_rounds(model) if early_stopping else np.nan
+        return _predict(model, binned['test'], stopped), stopped
+
+
+def _grow(estimator, params, budget_param, checkpoints, threads, X, y, X_test, y_test):
+    """Grow one warm-started forest through ascending tree counts; -MAE at each checkpoint.
+
+    With an integer random_state the first k trees are the ones a fresh fit
+    with k trees builds, so each score equals that candidate's own fit.
+    """
+    model = clone(estimator).set_params(**params, warm_start=True)
+    n_jobs = model.get_params()['n_jobs']
+    scores, grown = [], 0
+    with threadpool_limits(limits=threads, user_api='openmp'):
+        for n in checkpoints:
+            if n > grown:
+                model.set_params(**{budget_param: n}, n_jobs=threads).fit(X, y)
+                model.set_params(n_jobs=n_jobs)
+                grown = n
+            scores.append(-mean_absolute_error(y_test, model.predict(X_test)))
+    return scores
+
+
+def run_trial(estimator, params, threads, X, y, X_test, y_test, early_stopping=None,
+              budget_param=None, checkpoints=None, binned=None):
+    """(fold score, early-stopped rounds) per candidate of one trial: a warm-start group
+    when checkpoints are given, else a single fit (on pre-binned data when given)."""
+    if binned is not None:
+        pred, stopped = _fit_binned(estimator, params, threads, binned, early_stopping)
+        return [(-mean_absolute_error(y_test, pred), stopped)]
+    if checkpoints is not None:
+        scores = _grow(estimator, params, budget_param, checkpoints, threads, X, y, X_test, y_test)
+        return [(score, np.nan) for score in scores]
+    model = _fit(estimator, params, threads, X, y, early_stopping)
+    stopped = _stopped_rounds(model) if early_stopping else np.nan
+    return [(-mean_absolute_error(y_test, _predict(model, X_test, stopped)), stopped)]
+
+
+def _budget_param(estimator):
+    """Estimator parameter that scales fit cost (tree or boosting-round count)."""
+    params = estimator.get_params()
+    for name in ('n_estimators', 'max_iter'):
+        if name in params:
+            return name
+    return None
+
+
+def _cost(task):
+    # Longest fits first shortens the tail; tree/boosting rounds dominate fit time
+    _, family, _, _, params, budget, _ = task
+    rounds = params.get(family.budget_param, 100) if family.budget_param else 100
+    return rounds * budget
+
+
+class SearchFamily:
+    """One estimator's search: sampled candidates, per-rung fold scores, best refit.
+
+    budgets lists the fraction of the full budget used on each rung (the last is 1.0).
+    warm_start: candidates are n_iter / len(tree counts) sampled combinations of
+    the other parameters, each at every tree count of param_dist.
+    early_stopping: patience in rounds for boosting trials (None: full rounds).
+    prebin: trials fit on shared pre-binned folds where the library allows it.
+    """
+
+    def __init__(self, name, estimator, param_dist, n_iter=12, cv=3, random_state=42,
+                 budgets=(1.0,), factor=3, warm_start=False, early_stopping=None, prebin=False):
+        self.name = name
+        self.estimator = estimator
+        self.budget_param = _budget_param(estimator)
+        self.warm_start = warm_start
+        self.early_stopping = early_stopping
+        self.prebin = prebin
+        if early_stopping:
+            _early_stopping_params(estimator, early_stopping)  # fail fast if unsupported
+        if warm_start:
+            others = dict(param_dist)
+            counts = others.pop(self.budget_param, None)
+            if not isinstance(counts, (list, tuple)) or 'warm_start' not in estimator.get_params():
+                raise ValueError(f"{name}: warm_start needs a warm_start estimator and a list of "
+                                 f"{self.budget_param} values")
+            combos = ParameterSampler(others, math.ceil(n_iter / len(counts)),
+                                      random_state=random_state)
+            self.candidates = [{**p, self.budget_param: n} for p in combos for n in sorted(counts)]
+            self.grid = (len(combos), len(counts))
+        else:
+            self.candidates = list(ParameterSampler(param_dist, n_iter, random_state=random_state))
+            self.grid = None
+        self.cv = cv
+        self.budgets = list(budgets)
+        self.factor = factor
+        self.rung = 0
+        self.active = list(range(len(self.candidates)))
+        self.scores = [np.full((len(self.candidates), cv), np.nan) for _ in self.budgets]
+        self.stopped = [np.full((len(self.candidates), cv), np.nan) for _ in self.budgets]
+        self.pending = len(self.active) * cv
+        self.rung_sizes = [len(self.active)]
+        self.best_index_ = None
+        self.best_estimator_ = None
+        self.seconds = 0.0
+        self.rounds = 0
+        self.bin_seconds = 0.0
+        self.binned_trials = 0
+
+    @property
+    def budget(self):
+        return self.budgets[self.rung]
+
+    @property
+    def best_params_(self):
+        """Best candidate; with early stopping, its budget parameter is the stopped round count."""
+        params = dict(self.candidates[self.best_index_])
+        if self.early_stopping:
+            params[self.budget_param] = self.stopped_rounds
+        return params
+
+    @property
+    def max_rounds(self):
+        """Round cap of the best candidate."""
+        default = self.estimator.get_params()[self.budget_param]
+        return self.candidates[self.best_index_].get(self.budget_param, default)
+
+    @property
+    def stopped_rounds(self):
+        """Early-stopped round count of the best candidate, mean over its final folds."""
+        return max(1, int(round(np.nanmean(self.stopped[-1][self.best_index_]))))
+
+    def refit_params(self):
+        """best_params_ plus early stopping off, so the refit builds exactly those rounds."""
+        if not self.early_stopping:
+            return self.best_params_
+        return {**self.best_params_, **_early_stopping_params(self.estimator, None)}
+
+    @property
+    def best_score_(self):
+        return float(self.scores[-1][self.best_index_].mean())
+
+    def trial_params(self, c):
+        """Candidate c's params with the budget parameter scaled to the current rung."""
+        params = dict(self.candidates[c])
+        if self.budget < 1 and self.budget_param:
+            full = params.get(self.budget_param, self.estimator.get_params()[self.budget_param])
+            params[self.budget_param] = max(MIN_ROUNDS, int(round(full * self.budget)))
+        return params
+
+    def checkpoints(self, group):
+        """Scaled tree counts of a warm-start group (ascending)."""
+        return [self.trial_params(c)[self.budget_param] for c in group]
+
+    def groups(self):
+        """Active candidates as tuples fitted together: one forest per combination of
+        the non-tree parameters when warm starting, else one candidate each."""
+        if not self.warm_start:
+            return [(c,) for c in self.active]
+        groups = {}
+        for c in self.active:
+            others = {k: v for k, v in self.candidates[c].items() if k != self.budget_param}
+            groups.setdefault(repr(sorted(others.items())), []).append(c)
+        return [tuple(sorted(g, key=lambda c: self.candidates[c][self.budget_param]))
+                for g in groups.values()]
+
+    def tasks(self):
+        """('trial', family, candidates, fold, params, budget, remote_ok) for every fit of the
+        current rung; params are those of the group's last (largest) candidate."""
+        return [('trial', self, group, f, self.trial_params(group[-1]), self.budget, True)
+                for group in self.groups() for f in range(self.cv)]
+
+    def record(self, c, f, score, stopped=np.nan):
+        """Store one fold score (and early-stopped round count); True once the rung is complete."""
+        self.scores[self.rung][c, f] = score
+        self.stopped[self.rung][c, f] = stopped
+        self.pending -= 1
+        return self.pending == 0
+
+    def count_rounds(self, params, stopped=np.nan):
+        """Add the trees / boosting rounds one fit built (early-stopped: best + patience)."""
+        if not self.budget_param:
+            return
+        rounds = params.get(self.budget_param, self.estimator.get_params()[self.budget_param])
+        if not np.isnan(stopped):
+            rounds = min(rounds, int(stopped) + self.early_stopping)
+        self.rounds += rounds
+
+    def promote(self):
+        """Move the best 1/factor of the rung up; False once the last rung is done."""
+        means = self.scores[self.rung].mean(axis=1)
+        if np.isnan(means[self.active]).all():
+            raise ValueError(f"All {self.name} fits failed")
+        # Highest mean fold score first, earliest candidate on ties (RandomizedSearchCV's rank 1)
+        ranked = sorted(self.active, key=lambda c: (np.isnan(means[c]), -np.nan_to_num(means[c]), c))
+        if self.rung == len(self.budgets) - 1:
+            self.best_index_ = ranked[0]
+            return False
+        self.active = sorted(ranked[:max(1, math.ceil(len(self.active) / self.factor))])
+        self.rung += 1
+        self.pending = len(self.active) * self.cv
+        self.rung_sizes.append(len(self.active))
+        return True
+
+
+class SearchScheduler:
+    """Runs the searches of several families concurrently within n_cores threads."""
+
+    def __init__(self, n_cores=None, mode='full', factor=3, rungs=3, random_state=42, store=None,
+                 cluster=None):
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode {mode!r} (expected one of {SEARCH_MODES})")
+        self.n_cores = n_cores or available_cores()
+        self.mode = mode
+        self.factor = factor
+        self.budgets = [factor ** float(r - rungs + 1) for r in range(rungs)] if mode == 'halving' else [1.0]
+        self.random_state = random_state
+        self.store = store
+        self.cluster = cluster
+        self._data = None
+        self.families = []
+        self.report = None
+
+    def add(self, name, estimator, param_dist, n_iter=12, cv=3, random_state=42, warm_start=False,
+            early_stopping=None, prebin=False):
+        """Register a family; n_iter candidates (all on the first rung when halving).
+
+        warm_start=True (forests): tree counts are checkpoints of one grown forest.
+        early_stopping=rounds (boosting): trials stop on validation MAE patience.
+        prebin=True (XGBoost, HistGradientBoosting): trials share pre-binned folds.
+        """
+        self.families.append(SearchFamily(name, estimator, param_dist, n_iter, cv, random_state,
+                                          self.budgets, self.factor, warm_start, early_stopping,
+                                          prebin))
+        return self
+
+    def _folds(self, X, y):
+        """Per cv: (train indices, train indices in shuffled order, test X, test y, test indices)
+        per fold."""
+        order = np.random.RandomState(self.random_state).permutation(len(X))
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        folds = {}
+        for k in sorted({f.cv for f in self.families}):
+            # A reduced budget trains on a prefix of the shuffled rows (nested across rungs)
+            folds[k] = [(tr, tr[np.argsort(rank[tr], kind='stable')], X.iloc[te], y.iloc[te], te)
+                        for tr, te in KFold(n_splits=k).split(X)]
+        return folds
+
+    @staticmethod
+    def _train_index(fold, budget):
+        """Training row positions of a fold for a budget."""
+        tr, shuffled = fold[:2]
+        if budget < 1:
+            tr = np.sort(shuffled[:max(MIN_ROWS, int(round(len(tr) * budget)))])
+        return tr
+
+    def _train_rows(self, X, y, fold, budget, cache):
+        """Training rows of a fold for a budget, built once and shared by every fit on them."""
+        key = (id(fold), budget)
+        if key not in cache:
+            tr = self._train_index(fold, budget)
+            cache[key] = (X.iloc[tr], y.iloc[tr])
+        return cache[key]
+
+    def _remote(self, family, group, f, params, budget, folds):
+        """Send a trial to an idle cluster worker; the worker holds X, y and slices the fold."""
+        fold = folds[family.cv][f]
+        return self.cluster.submit(self._data, {
+            'estimator': family.estimator, 'params': params,
+            'train': self._train_index(fold, budget), 'test': fold[4],
+            'early_stopping': family.early_stopping, 'budget_param': family.budget_param,
+            'checkpoints': family.checkpoints(group) if family.warm_start else None})
+
+    def _fold_key(self, family, f, budget):
+        """Fold identity in the trial store (row subsets also depend on budget and seed)."""
+        key = f"kfold{family.cv}/{f}"
+        return key if budget >= 1 else f"{key}/rows{budget:.4f}/seed{self.random_state}"
+
+    def _store_options(self, family):
+        if family.early_stopping:
+            return {'early_stopping': family.early_stopping,
+                    'validation_fraction': VALIDATION_FRACTION}
+        return None
+
+    def _stored(self, family, group, f, budget):
+        """Stored (score, stopped rounds) of every candidate in group, or None if any is missing."""
+        fold = self._fold_key(family, f, budget)
+        results = [self.store.get(self._data, family.estimator, family.trial_params(c), fold,
+                                  self._store_options(family)) for c in group]
+        return None if any(r is None for r in results) else results
+
+    def _save(self, family, group, f, budget, results, seconds):
+        """Write a trial's fold scores to the store; returns how many were written."""
+        fold = self._fold_key(family, f, budget)
+        saved = 0
+        for c, (score, stopped) in zip(group, results):
+            if not np.isnan(score):  # failed fits are retried on the next run
+                self.store.put(self._data, family.estimator, family.trial_params(c), fold, score,
+                               stopped, seconds, self._store_options(family))
+                saved += 1
+        return saved
+
+    def _record(self, family, group, f, results, pending):
+        """Record a trial's fold scores; queue the next rung or the refit once the rung is done."""
+        for candidate, (score, stopped) in zip(group, results):
+            complete = family.record(candidate, f, score, stopped)
+        if not complete:
+            return
+        if family.promote():
+            print(f"   ⤴️  {family.name}: {len(family.active)}/{family.rung_sizes[-2]} "
+                  f"candidates promoted to {family.budget:.0%} budget")
+            # The next rung gates the family's result, so it goes first
+            pending.extendleft(reversed(sorted(family.tasks(), key=lambda t: -_cost(t))))
+        else:
+            # So does the refit on the full training set
+            pending.appendleft(('refit', family, None, None, family.refit_params(), 1.0, False))
+
+    @staticmethod
+    def _binned(family, params, fold, budget, train_X, train_y, cache):
+        """Shared pre-binned fold for a trial, one per bin setting (None: fit on raw rows).
+
+        Only registers the fold; the trial builds it on its pool thread.
+        """
+        model = clone(family.estimator).set_params(**params)
+        setting = _bin_setting(model) if family.prebin else None
+        if setting is None:
+            return None
+        # An early stopping split changes which rows the bins are fitted on
+        key = (id(fold), budget, setting, bool(family.early_stopping))
+        if key not in cache:
+            cache[key] = _SharedBins(family, setting, train_X, train_y, fold[2],
+                                     family.early_stopping, model.get_params().get('random_state'))
+        family.binned_trials += 1
+        return cache[key]
+
+    def _trial(self, family, group, params, train_X, train_y, test_X, test_y, threads, binned=None):
+        """(fold score, early-stopped rounds) of each candidate in group."""
+        try:
+            if binned is not None:
+                binned = binned.get(threads)
+            return run_trial(family.estimator, params, threads, train_X, train_y, test_X, test_y,
+                             family.early_stopping, family.budget_param,
+                             family.checkpoints(group) if family.warm_start else None, binned)
+        except Exception as e:
+            print(f"   ⚠️  {family.name} candidates {list(group)} failed: {e}")
+            return [(np.nan, np.nan)] * len(group)
+
+    def run(self, X, y):
+        """Fit every family; returns {name: family} (best_estimator_, best_params_, best_score_)."""
+        folds = self._folds(X, y)
+        rows, bins = {}, {}
+        if self.store is not None or self.cluster is not None:
+            self._data = data_fingerprint(X, y)
+        if self.cluster is not None:
+            self.cluster.share(self._data, X, y)
+        pending = deque(sorted((t for f in self.families for t in f.tasks()), key=lambda t: -_cost(t)))
+
+        how = "concurrently" if self.mode == 'full' else "concurrently with successive halving"
+        print(f"   🔎 Tuning {', '.join(f.name for f in self.families)} {how} "
+              f"({len(pending)} fits on {self.n_cores} cores)...")
+
+        free = self.n_cores
+        running = {}
+        fits = reused = recorded = remote_fits = 0
+        thread_seconds = 0.0
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        with ThreadPoolExecutor(max_workers=self.n_cores) as pool:
+            while pending or running:
+                while pending:
+                    task = pending[0]
+                    kind, family, c, f, params, budget, remote_ok = task
+                    if kind == 'trial' and self.store is not None:
+                        stored = self._stored(family, c, f, budget)
+                        if stored is not None:
+                            pending.popleft()
+                            reused += len(c)
+                            self._record(family, c, f, stored, pending)
+                            continue
+                    remote = remote_ok and self.cluster is not None and self.cluster.idle() > 0
+                    if not remote and free <= 0:
+                        break
+                    pending.popleft()
+                    if remote:
+                        future = self._remote(family, c, f, params, budget, folds)
+                        running[future] = (task, 0, time.perf_counter(), True)
+                        continue
+                    # Spread the free cores over what is still queued
+                    threads = max(1, free // (len(pending) + 1))
+                    free -= threads
+                    if kind == 'trial':
+                        fold = folds[family.cv][f]
+                        train_X, train_y = self._train_rows(X, y, fold, budget, rows)
+                        binned = self._binned(family, params, fold, budget, train_X, train_y, bins)
+                        future = pool.submit(self._trial, family, c, params,
+                                             train_X, train_y, fold[2], fold[3], threads, binned)
+                    else:
+                        future = pool.submit(_fit, family.estimator, params, threads, X, y)
+                    running[future] = (task, threads, time.perf_counter(), False)
+
+                # With a cluster, wake up now and then to hand work to newly joined workers
+                done, _ = wait(running, timeout=1 if self.cluster is not None else None,
+                               return_when=FIRST_COMPLETED)
+                for future in done:
+                    task, threads, started, remote = running.pop(future)
+                    kind, family, c, f, params, budget, _ = task
+                    free += threads
+                    if remote and future.exception() is not None:
+                        print(f"   ⚠️  Remote {family.name} trial failed ({future.exception()}), "
+                              f"running it locally")
+                        pending.appendleft(task[:-1] + (False,))
+                        continue
+                    fits += 1
+                    remote_fits += remote
+                    elapsed = time.perf_counter() - started
+                    family.seconds += elapsed
+                    thread_seconds += elapsed * threads
+                    if kind == 'refit':
+                        family.count_rounds(params)
+                        family.best_estimator_ = future.result()
+                        print(f"   ➜ Best CV MAE for {family.name}: {-family.best_score_:.4f}")
+                        continue
+                    results = future.result()
+                    family.count_rounds(params, results[-1][1])
+                    if self.store is not None:
+                        recorded += self._save(family, c, f, budget, results, elapsed)
+                    self._record(family, c, f, results, pending)
+
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+        bins = [entry for entry in bins.values() if entry.built]
+        for entry in bins:
+            entry.family.bin_seconds += entry.seconds
+        capacity = wall * self.n_cores
+        self.report = {
+            'mode': self.mode,
+            'cores': self.n_cores,
+            'fits': fits,
+            'reused_trials': reused,
+            'recorded_trials': recorded,
+            'remote_fits': remote_fits,
+            'workers': self.cluster.workers if self.cluster is not None else 0,
+            'wall_seconds': round(wall, 3),
+            'cpu_seconds': round(cpu, 3),
+            'cpu_utilization': round(cpu / capacity, 3) if capacity > 0 else None,
+            'thread_utilization': round(thread_seconds / capacity, 3) if capacity > 0 else None,
+            'bin_builds': len(bins),
+            'bin_seconds': round(sum(f.bin_seconds for f in self.families), 3),
+            'families': {f.name: {'fit_seconds': round(f.seconds, 3),
+                                  'warm_start': f.warm_start and {
+                                      'combinations': f.grid[0], 'param': f.budget_param,
+                                      'values': f.grid[1]},
+                                  'rounds_built': f.rounds,
+                                  'bin_seconds': round(f.bin_seconds, 3),
+                                  'binned_trials': f.binned_trials,
+                                  'best_cv_mae': round(-f.best_score_, 6),
+                                  'best_params': f.best_params_,
+                                  'early_stopping': f.early_stopping and {
+                                      'patience': f.early_stopping, 'param': f.budget_param,
+                                      'rounds': f.stopped_rounds, 'max_rounds': f.max_rounds},
+                                  'rungs': [{'budget': round(b, 4), 'candidates': n}
+                                            for b, n in zip(f.budgets, f.rung_sizes)]}
+                         for f in self.families},
+        }
+        print(f"   ⏱️  Search wall time: {wall:.1f}s, CPU utilization: "
+              f"{self.report['cpu_utilization']:.0%} of {self.n_cores} cores")
+        if self.cluster is not None:
+            print(f"   🛰️  {remote_fits} of {fits} fits ran on cluster workers "
+                  f"({self.cluster.workers} connected)")
+        if self.store is not None:
+            print(f"   💾 Trial store: {reused} fold scores reused, {recorded} recorded "
+                  f"({self.store.path})")
+        if bins:
+            print(f"   🧱 Pre-binned {len(bins)} folds in {self.report['bin_seconds']:.2f}s, "
+                  f"shared by {sum(f.binned_trials for f in self.families)} trials")
+        return {f.name: f for f in self.families}
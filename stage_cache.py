@@ -0,0 +1,137 @@
+"""
+STAGE CACHE - Fingerprinted on-disk cache for preprocessing stages
+Each stage result is keyed by the input content hash, every stage name and
+parameters up to it, and the version of the feature code. Unchanged stages
+are loaded instead of recomputed; least recently used entries are evicted
+to keep the cache directory bounded.
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import pickle
+from functools import lru_cache
+
+CACHE_DIR = "data/cache"
+MAX_CACHE_BYTES = 2 * 1024**3
+
+# Feature code every stage depends on; editing any of these invalidates the cache
+CODE_FILES = ['feature_transform.py', 'feature_buckets.py', 'topic_categories.py']
+
+
+def _digest(*parts):
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(str(part).encode())
+        h.update(b'\0')
+    return h.hexdigest()
+
+
+def file_fingerprint(path, block_size=1 << 20):
+    """SHA-256 of a file's content."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+@lru_cache(maxsize=None)
+def _source_digest(path):
+    return file_fingerprint(path)
+
+
+def code_version(func):
+    """Digest of the shared feature code plus the module that defines func."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    files = [os.path.join(here, f) for f in CODE_FILES]
+    module_file = inspect.getsourcefile(inspect.unwrap(func))
+    if module_file and os.path.isfile(module_file) and os.path.abspath(module_file) not in files:
+        files.append(os.path.abspath(module_file))
+    return _digest(*(_source_digest(f) for f in files))
+
+
+def run_stages(stages, value):
+    """Run (name, func, params) stages in order, feeding each result to the next."""
+    for _, func, params in stages:
+        value = func(value, **params)
+    return value
+
+
+class StageCache:
+    """Chain of cached stages over one input; keys advance as stages run."""
+
+    def __init__(self, source_key, cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+        self.key = source_key
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.used = set()
+        self.skipped = []  # stages served from the cache instead of run
+
+    @classmethod
+    def for_file(cls, path, **kwargs):
+        return cls(file_fingerprint(path), **kwargs)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.pkl")
+
+    def run(self, stages, value):
+        """Run stages, resuming after the last one whose result is already cached.
+
+        Only that one result is loaded; earlier cached stages are skipped entirely.
+        """
+        keys = []
+        key = self.key
+        for name, func, params in stages:
+            key = _digest(key, name, json.dumps(params, sort_keys=True, default=repr), code_version(func))
+            keys.append(key)
+
+        start = 0
+        for i in reversed(range(len(stages))):
+            path = self._path(keys[i])
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    value = pickle.load(f)
+                os.utime(path)  # mark as recently used
+                self.used.add(keys[i])
+                print(f"♻️  Loaded '{stages[i][0]}' stage from cache")
+                start = i + 1
+                self.skipped += [name for name, _, _ in stages[:start]]
+                break
+
+        for (name, func, params), key in zip(stages[start:], keys[start:]):
+            value = func(value, **params)
+            self._store(key, value)
+
+        if keys:
+            self.key = keys[-1]
+        self._evict()
+        return value
+
+    def _store(self, key, value):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        self.used.add(key)
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes."""
+        if not os.path.isdir(self.cache_dir):
+            return
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.pkl'):
+                stat = os.stat(os.path.join(self.cache_dir, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if name[:-len('.pkl')] in self.used:
+                continue  # never evict what this run just produced or read
+            os.remove(os.path.join(self.cache_dir, name))
+            total -= size
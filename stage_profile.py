@@ -0,0 +1,84 @@
+"""
+STAGE PROFILE - Per-stage timing and memory report for preprocessing
+Records wall time and rows/sec for each stage and writes them as JSON.
+Memory is opt-in (trace_memory, via tracemalloc, which slows every
+allocation): the peak bytes allocated during the stage and the bytes it
+still holds at the end, counting every allocation (copies made by
+dropna, fillna, astype, reindexing, ...), not only explicit copies.
+"""
+
+import json
+import os
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from functools import wraps
+import pandas as pd
+
+
+def _rows(result):
+    """Row count of a stage result (a DataFrame or Arrow table, or a tuple starting with one)."""
+    if isinstance(result, tuple) and result:
+        result = result[0]
+    if isinstance(result, pd.DataFrame):
+        return len(result)
+    return getattr(result, 'num_rows', None)
+
+
+class StageProfiler:
+    """Collects one record per measured stage; trace_memory turns on tracemalloc."""
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.stages = []
+        self.started = time.perf_counter()
+        self._owns_tracing = False
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracing = True
+
+    def measure(self, name, func, *args, **kwargs):
+        """Call func(*args, **kwargs) and record it as stage name."""
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        seconds = time.perf_counter() - start
+        if self.trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+        rows = _rows(result)
+        self.stages.append({
+            'stage': name,
+            'seconds': round(seconds, 6),
+            'rows': rows,
+            'rows_per_sec': round(rows / seconds, 1) if rows is not None and seconds > 0 else None,
+            'peak_bytes': peak - base if self.trace_memory else None,
+            'retained_bytes': current - base if self.trace_memory else None,
+        })
+        return result
+
+    def wrap(self, name, func):
+        """func with every call measured as stage name."""
+        @wraps(func)
+        def measured(*args, **kwargs):
+            return self.measure(name, func, *args, **kwargs)
+        return measured
+
+    def report(self, **context):
+        return {
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            **context,
+            'total_seconds': round(time.perf_counter() - self.started, 6),
+            'stages': self.stages,
+        }
+
+    def save(self, path, **context):
+        """Write the JSON report (context adds top-level fields such as the input file)."""
+        if self._owns_tracing:
+            tracemalloc.stop()
+            self._owns_tracing = False
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.report(**context), f, indent=2)
+        return path
@@ -0,0 +1,209 @@
+"""
+STREAMING STATISTICS - Mergeable fitting statistics for preprocessing
+Collects everything clean_data / encode_and_normalize fit (medians, modes,
+category vocabularies, StandardScaler moments) one chunk at a time.
+Partial statistics merge, so chunks or shards can be fitted independently.
+"""
+
+from collections import Counter
+import numpy as np
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+from feature_buckets import BUCKET_SPECS, bucketize, bucketize_array
+from feature_transform import TARGET, NUMERICAL_COLS, CATEGORICAL_COLS
+from topic_categories import expand_topic_category
+
+
+class QuantileSketch:
+    """Mergeable streaming histogram (value -> count) for medians.
+
+    Exact while the number of distinct values stays under max_bins (always
+    exact with max_bins=None). Beyond that, neighbouring values are compacted
+    into equal-weight centroid bins and the median becomes approximate.
+    """
+
+    def __init__(self, max_bins=65536):
+        self.max_bins = max_bins
+        self.values = np.empty(0, dtype=np.float64)
+        self.counts = np.empty(0, dtype=np.int64)
+        self.exact = True
+
+    def update(self, values):
+        values, counts = np.unique(np.asarray(values, dtype=np.float64), return_counts=True)
+        self._absorb(values, counts)
+
+    def merge(self, other):
+        self._absorb(other.values, other.counts)
+        self.exact = self.exact and other.exact
+
+    def _absorb(self, values, counts):
+        values = np.concatenate([self.values, values])
+        counts = np.concatenate([self.counts, counts])
+        self.values, inverse = np.unique(values, return_inverse=True)
+        self.counts = np.bincount(inverse.ravel(), weights=counts, minlength=len(self.values)).astype(np.int64)
+        if self.max_bins and len(self.values) > self.max_bins:
+            self._compact()
+
+    def _compact(self):
+        """Group neighbouring values into max_bins/2 bins of roughly equal weight."""
+        self.exact = False
+        n_bins = self.max_bins // 2
+        before = np.cumsum(self.counts) - self.counts
+        groups = (before * n_bins // self.counts.sum()).astype(np.int64)
+        starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+        weights = np.add.reduceat(self.counts, starts)
+        sums = np.add.reduceat(self.values * self.counts, starts)
+        self.values, self.counts = sums / weights, weights
+
+    @property
+    def count(self):
+        return int(self.counts.sum())
+
+    def median(self):
+        """Median with pandas semantics (mean of the two middle values)."""
+        n = self.count
+        if n == 0:
+            return np.nan
+        cum = np.cumsum(self.counts)
+        lo = self.values[np.searchsorted(cum, (n - 1) // 2, side='right')]
+        hi = self.values[np.searchsorted(cum, n // 2, side='right')]
+        # + 0.0 turns -0.0 into 0.0, as pandas' median does
+        return (lo + hi) / 2 + 0.0
+
+
+class Moments:
+    """Count / mean / sum of squared deviations, merged with Chan's formula."""
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, values, count=None):
+        values = np.asarray(values, dtype=np.float64)
+        if count is None:
+            n = len(values)
+            if n == 0:
+                return
+            mean = values.mean()
+            m2 = ((values - mean) ** 2).sum()
+        else:
+            # count copies of a single value (missing values filled with the median)
+            n, mean, m2 = count, float(values), 0.0
+        self._combine(n, mean, m2)
+
+    def merge(self, other):
+        self._combine(other.n, other.mean, other.m2)
+
+    def _combine(self, n, mean, m2):
+        if n == 0:
+            return
+        total = self.n + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta ** 2 * self.n * n / total
+        self.n = total
+
+    @property
+    def var(self):
+        return self.m2 / self.n if self.n else 0.0
+
+
+class FitStatistics:
+    """Partial fitting statistics for one chunk/shard of selected, row-filtered data."""
+
+    def __init__(self, max_bins=65536):
+        self.rows = 0
+        self.quantiles = {col: QuantileSketch(max_bins) for col in NUMERICAL_COLS + [TARGET]}
+        self.moments = {col: Moments() for col in NUMERICAL_COLS}
+        self.nulls = Counter()
+        self.counts = {col: Counter() for col in CATEGORICAL_COLS}
+        self.bucket_ids = {col: set() for col in BUCKET_SPECS}
+
+    def update(self, df):
+        """Absorb a chunk that went through select_features and the sparse-row drop."""
+        self.rows += len(df)
+        for col, sketch in self.quantiles.items():
+            if col not in df.columns:
+                continue
+            values = df[col].to_numpy(dtype=np.float64)
+            present = values[~np.isnan(values)]
+            self.nulls[col] += len(values) - len(present)
+            sketch.update(present)
+            if col in self.moments:
+                self.moments[col].update(present)
+        for col in CATEGORICAL_COLS:
+            if col in df.columns:
+                self.counts[col].update(df[col].dropna().tolist())
+        for col, (source, cuts) in BUCKET_SPECS.items():
+            if source in df.columns:
+                values = df[source].to_numpy(dtype=np.float64)
+                ids = bucketize_array(values[~np.isnan(values)], cuts)
+                self.bucket_ids[col].update(np.unique(ids).tolist())
+        return self
+
+    def merge(self, other):
+        self.rows += other.rows
+        for col, sketch in self.quantiles.items():
+            sketch.merge(other.quantiles[col])
+        for col, moments in self.moments.items():
+            moments.merge(other.moments[col])
+        self.nulls.update(other.nulls)
+        for col, counts in self.counts.items():
+            counts.update(other.counts[col])
+        for col, ids in self.bucket_ids.items():
+            ids.update(other.bucket_ids[col])
+        return self
+
+    @property
+    def exact(self):
+        return all(sketch.exact for sketch in self.quantiles.values())
+
+    def finalize(self):
+        """Fitted (fill_values, encoders, scaler), equivalent to the in-memory fit."""
+        fill_values = {}
+        for col, sketch in self.quantiles.items():
+            if sketch.count:
+                fill_values[col] = sketch.median()
+        for col, counts in self.counts.items():
+            if counts:
+                # pandas mode()[0]: most frequent, smallest value on ties
+                top = max(counts.values())
+                fill_values[col] = min(v for v, c in counts.items() if c == top)
+
+        encoders = {}
+        for col in CATEGORICAL_COLS:
+            values = set(self.counts[col])
+            if col == 'topic_category':
+                values = {expand_topic_category(v) for v in values}
+            if values:
+                encoders[col] = _label_encoder(str(v) for v in values)
+        for col, (source, cuts) in BUCKET_SPECS.items():
+            ids = set(self.bucket_ids[col])
+            if self.nulls[source] and source in fill_values:
+                ids.add(bucketize(fill_values[source], cuts))
+            encoders[col] = _label_encoder(str(i) for i in ids)
+
+        scaler = StandardScaler()
+        moments = []
+        for col in NUMERICAL_COLS:
+            m = Moments()
+            m.merge(self.moments[col])
+            if self.nulls[col]:
+                # The scaler is fitted after missing values become the median
+                m.update(fill_values[col], count=self.nulls[col])
+            moments.append(m)
+        scaler.mean_ = np.array([m.mean for m in moments])
+        scaler.var_ = np.array([m.var for m in moments])
+        scale = np.sqrt(scaler.var_)
+        scaler.scale_ = np.where(scale == 0, 1.0, scale)
+        scaler.n_samples_seen_ = moments[0].n if moments else 0
+        scaler.n_features_in_ = len(NUMERICAL_COLS)
+        scaler.feature_names_in_ = np.array(NUMERICAL_COLS, dtype=object)
+
+        return fill_values, encoders, scaler
+
+
+def _label_encoder(classes):
+    le = LabelEncoder()
+    le.classes_ = np.array(sorted(classes), dtype=object)
+    return le
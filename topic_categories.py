@@ -0,0 +1,73 @@
+"""
+TOPIC CATEGORIES - Compiled topic classifier
+Maps coarse topic labels to a richer set of categories.
+All keyword rules are compiled into one regex; a column is classified
+once per distinct value and mapped back to rows.
+"""
+
+import re
+import numpy as np
+import pandas as pd
+
+# Ordered rules: the first label with a matching keyword wins
+TOPIC_RULES = [
+    ("technology", ["tech", "ai", "software", "product", "saas", "cloud", "data"]),
+    ("marketing", ["marketing", "brand", "ad", "campaign", "social", "content"]),
+    ("education", ["learn", "course", "study", "tutorial", "guide", "lesson"]),
+    ("business", ["business", "revenue", "sales", "clients", "startup", "founder", "b2b", "b2c"]),
+    ("finance", ["finance", "invest", "investment", "crypto", "stock", "bank", "budget"]),
+    ("health", ["health", "medical", "wellbeing", "wellness", "mental", "fitness", "care"]),
+    ("lifestyle", ["lifestyle", "travel", "food", "life", "family", "home"]),
+    ("entertainment", ["entertainment", "movie", "film", "music", "show", "game", "gaming"]),
+    ("sports", ["sports", "football", "soccer", "basketball", "tennis", "run", "workout"]),
+    ("news", ["news", "update", "breaking", "trending", "headline"]),
+    ("career", ["career", "job", "hiring", "interview", "resume", "cv", "promotion"]),
+    ("productivity", ["productivity", "workflow", "automation", "process", "time management"]),
+    ("design", ["design", "ux", "ui", "graphic", "creative"]),
+    ("engineering", ["engineering", "code", "developer", "dev", "program", "build"]),
+    ("motivation", ["motivation", "inspiration", "mindset", "success", "discipline"]),
+]
+
+
+def _compile_rules(rules):
+    """Build one regex over every keyword plus a keyword -> rule priority map."""
+    priority = {}
+    for rank, (_, keywords) in enumerate(rules):
+        for k in keywords:
+            priority.setdefault(k, rank)
+    # Alternatives are listed in rule order, so at any position the regex
+    # reports the highest-priority keyword starting there. The lookahead
+    # makes matches overlap, so no keyword is hidden behind another.
+    ordered = sorted(priority, key=lambda k: priority[k])
+    pattern = re.compile("(?=(" + "|".join(re.escape(k) for k in ordered) + "))")
+    return pattern, priority
+
+
+_TOPIC_PATTERN, _KEYWORD_PRIORITY = _compile_rules(TOPIC_RULES)
+
+
+def expand_topic_category(raw: str) -> str:
+    """Map coarse topic labels to a richer set of categories."""
+    if not isinstance(raw, str):
+        return "general"
+    text = raw.lower()
+
+    best = None
+    for match in _TOPIC_PATTERN.finditer(text):
+        rank = _KEYWORD_PRIORITY[match.group(1)]
+        if best is None or rank < best:
+            best = rank
+            if best == 0:
+                break
+
+    if best is not None:
+        return TOPIC_RULES[best][0]
+    return text if text else "general"
+
+
+def classify_topics(series):
+    """Classify a topic column, evaluating each distinct value only once."""
+    codes, uniques = pd.factorize(series)
+    # Missing values get code -1, which indexes the trailing "general"
+    labels = np.array([expand_topic_category(u) for u in uniques] + ["general"], dtype=object)
+    return pd.Series(labels[codes], index=series.index, name=series.name)
@@ -12,6 +12,7 @@ from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
 from sklearn.linear_model import Ridge
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 import os
+from columnar_store import load_cleaned_data
 
 # MLflow setup
 mlflow.set_experiment("engagement_rate_regression")
@@ -21,7 +22,7 @@ print("="*70)
 
 # Load preprocessed data
 print("\n📂 Loading preprocessed data...")
-df = pd.read_csv("data/processed/cleaned_data.csv")
+df = load_cleaned_data("data/processed/cleaned_data.csv")
 
 X = df.drop('engagement_rate', axis=1)
 y = df['engagement_rate']
@@ -7,18 +7,27 @@ import pandas as pd
 import numpy as np
 import pickle
 import os
-from sklearn.model_selection import train_test_split, RandomizedSearchCV
+import sys
+import json
+from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestRegressor, ExtraTreesRegressor, HistGradientBoostingRegressor, VotingRegressor
 from xgboost import XGBRegressor
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+import columnar_store
+from search_scheduler import SearchScheduler
+from search_cluster import Coordinator, SEARCH_COORDINATOR
+from trial_store import TrialStore
 
 MODEL_DIR = "models"
+SEARCH_REPORT = f"{MODEL_DIR}/search_profile.json"
+TRIAL_STORE = f"{MODEL_DIR}/trials.sqlite"
+EARLY_STOPPING_ROUNDS = 20  # boosting trials stop after this many rounds without improvement
 
 
 def load_cleaned_data(filepath="data/processed/cleaned_data.csv"):
-    """Load preprocessed data."""
+    """Load preprocessed data (memory-mapped columnar store when available)."""
     print("📂 Loading cleaned data...")
-    df = pd.read_csv(filepath)
+    df = columnar_store.load_cleaned_data(filepath)
     print(f"✅ Loaded: {len(df)} rows, {len(df.columns)} columns")
     return df
 
@@ -64,27 +73,54 @@ def split_data(X, y, test_size=0.2):
     return X_train, X_test, y_train, y_test
 
 
-def _search(estimator, param_dist, X_train, y_train, name: str):
-    """Run randomized search for a single estimator."""
-    search = RandomizedSearchCV(
-        estimator,
-        param_distributions=param_dist,
-        n_iter=12,
-        cv=3,
-        scoring="neg_mean_absolute_error",
-        n_jobs=-1,
-        random_state=42,
-        verbose=0,
-    )
-    print(f"   🔎 Tuning {name}...")
-    search.fit(X_train, y_train)
-    best_mae = -search.best_score_
-    print(f"   ➜ Best CV MAE for {name}: {best_mae:.4f}")
-    return search.best_estimator_, search.best_params_, best_mae
+def save_search_report(report, path=SEARCH_REPORT):
+    """Write the search wall time / CPU utilization report."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"   💾 Search profile: {path}")
+
+
+def format_selection(best_params, search=None):
+    """MODEL SELECTION block of metrics.txt (also printed after the search)."""
+    lines = ["MODEL SELECTION:",
+             f"  Estimator: {best_params.get('estimator', 'n/a')}",
+             f"  Best Params: {best_params}"]
+    if search:
+        rungs = " → ".join(str(n) for n in search['rungs'])
+        grid = search.get('warm_start')
+        # Warm-start grids are not RandomizedSearchCV's candidates: say so next to the scores
+        grid = (f"; warm-start grid: {grid['combinations']} sampled combinations × "
+                f"{grid['values']} {grid['param']} values, not comparable to RandomizedSearchCV"
+                if grid else "")
+        lines.append(f"  Search: {search['mode']} ({rungs} candidates per family, "
+                     f"{search['wall_seconds']:.1f}s{grid})")
+        lines.append(f"  CV MAE: {search['cv_mae']:.4f}")
+        stopping = search.get('early_stopping')
+        if stopping:
+            lines.append(f"  Early Stopping: {stopping['param']} = {stopping['rounds']} of "
+                         f"{stopping['max_rounds']} (mean over CV folds, patience "
+                         f"{stopping['patience']})")
+    return "\n".join(lines) + "\n"
 
 
-def train_model(X_train, y_train):
-    """Tune and select the best ensemble/boosting model with aggressive hyperparameter search."""
+def train_model(X_train, y_train, search="full", store_path=TRIAL_STORE):
+    """Tune and select the best ensemble/boosting model with aggressive hyperparameter search.
+
+    search="halving" scores 27 candidates per family on small budgets and
+    promotes the best third twice (27 → 9 → 3) up to full budget.
+    Forest candidates share warm-started forests: each parameter combination
+    is grown once and scored at every n_estimators value. Boosting trials
+    stop early on a validation split of each fold; the chosen model is refit
+    with the stopped round count. Their folds are binned once and shared.
+    Note for HistGradientBoosting: early stopping is always on during the
+    search (10% holdout, validation MAE, patience EARLY_STOPPING_ROUNDS);
+    its default 'auto' used to enable it only above 10,000 rows, on the loss.
+    Fold scores persist in the trial store at store_path (None disables it),
+    so a rerun on the same data skips scored trials and resumes a killed search.
+    With SEARCH_COORDINATOR=host:port set, trials also run on search_cluster
+    workers that connect to that address.
+    """
     print("\n🌲 Training ensemble models with hyperparameter search...")
 
     rf_params = {
@@ -119,29 +155,42 @@ def train_model(X_train, y_train):
         "min_child_weight": [1, 2, 3],
     }
 
-    rf_best, rf_params_best, rf_mae = _search(
-        RandomForestRegressor(random_state=42, n_jobs=-1), rf_params, X_train, y_train, "RandomForest"
-    )
-    et_best, et_params_best, et_mae = _search(
-        ExtraTreesRegressor(random_state=42, n_jobs=-1), et_params, X_train, y_train, "ExtraTrees"
-    )
-    hgb_best, hgb_params_best, hgb_mae = _search(
-        HistGradientBoostingRegressor(random_state=42), hgb_params, X_train, y_train, "HistGradientBoosting"
-    )
-    xgb_best, xgb_params_best, xgb_mae = _search(
-        XGBRegressor(random_state=42, n_jobs=-1, verbosity=0), xgb_params, X_train, y_train, "XGBoost"
-    )
+    # All four searches share one core budget instead of running back to back
+    n_iter = 27 if search == "halving" else 12
+    store = TrialStore(store_path) if store_path else None
+    cluster = Coordinator() if SEARCH_COORDINATOR else None
+    scheduler = (SearchScheduler(mode=search, store=store, cluster=cluster)
+                 .add("RandomForest", RandomForestRegressor(random_state=42, n_jobs=-1), rf_params,
+                      n_iter, warm_start=True)
+                 .add("ExtraTrees", ExtraTreesRegressor(random_state=42, n_jobs=-1), et_params,
+                      n_iter, warm_start=True)
+                 .add("HistGradientBoosting", HistGradientBoostingRegressor(random_state=42),
+                      hgb_params, n_iter, early_stopping=EARLY_STOPPING_ROUNDS, prebin=True)
+                 .add("XGBoost", XGBRegressor(random_state=42, n_jobs=-1, verbosity=0), xgb_params,
+                      n_iter, early_stopping=EARLY_STOPPING_ROUNDS, prebin=True))
+    try:
+        searches = scheduler.run(X_train, y_train)
+    finally:
+        if store:
+            store.close()
+        if cluster:
+            cluster.close()
+    save_search_report(scheduler.report)
 
     # Find best single model
-    candidates = [(rf_mae, "RandomForest", rf_best, rf_params_best),
-                  (et_mae, "ExtraTrees", et_best, et_params_best),
-                  (hgb_mae, "HistGradientBoosting", hgb_best, hgb_params_best),
-                  (xgb_mae, "XGBoost", xgb_best, xgb_params_best)]
+    candidates = [(-s.best_score_, name, s.best_estimator_, s.best_params_)
+                  for name, s in searches.items()]
     
     best = min(candidates, key=lambda x: x[0])
     best_mae, name, model, params = best
     print(f"   ✅ Selected {name} (best CV MAE)")
-    return model, {"estimator": name, **params}
+    best_params = {"estimator": name, **params}
+    summary = {'mode': search, 'cv_mae': best_mae, 'wall_seconds': scheduler.report['wall_seconds'],
+               'rungs': searches[name].rung_sizes,
+               'warm_start': scheduler.report['families'][name]['warm_start'],
+               'early_stopping': scheduler.report['families'][name]['early_stopping']}
+    print("\n" + format_selection(best_params, summary))
+    return model, best_params, summary
 
 
 def evaluate(model, X_train, y_train, X_test, y_test):
@@ -180,7 +229,7 @@ def evaluate(model, X_train, y_train, X_test, y_test):
     return metrics, y_test_pred
 
 
-def save_model(model, metrics, best_params):
+def save_model(model, metrics, best_params, search=None):
     """Save trained model and metrics."""
     print("\n💾 Saving model...")
     
@@ -197,9 +246,7 @@ def save_model(model, metrics, best_params):
         f.write("MODEL PERFORMANCE METRICS\n")
         f.write("="*60 + "\n\n")
 
-        f.write("MODEL SELECTION:\n")
-        f.write(f"  Estimator: {best_params.get('estimator', 'n/a')}\n")
-        f.write(f"  Best Params: {best_params}\n\n")
+        f.write(format_selection(best_params, search) + "\n")
 
         f.write("TRAINING SET:\n")
         f.write(f"  MAE:  {metrics['train']['mae']:.4f}\n")
@@ -214,9 +261,9 @@ def save_model(model, metrics, best_params):
     print(f"   ✅ {MODEL_DIR}/metrics.txt")
 
 
-def train_and_evaluate(data_file="data/processed/cleaned_data.csv"):
+def train_and_evaluate(data_file="data/processed/cleaned_data.csv", search="full"):
     """
-    Complete training pipeline:
+    Complete training pipeline (search: "full" or "halving"):
     1. Load data
     2. Prepare features/target
     3. Split train/test
@@ -231,9 +278,9 @@ def train_and_evaluate(data_file="data/processed/cleaned_data.csv"):
     df = load_cleaned_data(data_file)
     X, y = prepare_data(df)
     X_train, X_test, y_train, y_test = split_data(X, y)
-    model, best_params = train_model(X_train, y_train)
+    model, best_params, summary = train_model(X_train, y_train, search)
     metrics, y_pred = evaluate(model, X_train, y_train, X_test, y_test)
-    save_model(model, metrics, best_params)
+    save_model(model, metrics, best_params, summary)
     
     print("\n✅ TRAINING COMPLETE!")
     print("   Model saved and ready for predictions")
@@ -242,4 +289,5 @@ def train_and_evaluate(data_file="data/processed/cleaned_data.csv"):
 
 
 if __name__ == "__main__":
-    model, metrics = train_and_evaluate()
+    args = sys.argv[1:]
+    model, metrics = train_and_evaluate(search=args[0] if args else "full")
@@ -0,0 +1,325 @@
+"""
+TRANSFER ENGINE - Concurrent artifact uploads and downloads over a BlobStore
+One asyncio loop drives every transfer; the blocking store calls run on a
+thread pool and share a single concurrency limit across all files.
+Uploads are split into blocks read lazily from a file, bytes or a generator
+of bytes, so memory stays around concurrency * block_size. Block ids carry a
+content hash, so re-running an interrupted upload skips the blocks the store
+already has staged. Downloads write ranges into a .partial file with a JSON
+sidecar of finished offsets (and the blob's ETag) and resume the same way
+while the remote blob is unchanged.
+sync() skips artifacts whose content MD5 matches the remote copy, using a
+local manifest of what was last uploaded when the remote has no MD5.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+BLOCK_SIZE = 4 * 1024 * 1024
+CONCURRENCY = 8
+SYNC_MANIFEST = "data/sync_manifest.json"
+
+
+def iter_blocks(source, block_size=BLOCK_SIZE):
+    """Fixed-size blocks of a file path, a bytes object or an iterable of bytes.
+
+    A callable source is called for a fresh iterable, so it can be read twice.
+    """
+    if callable(source):
+        source = source()
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        data = memoryview(source)
+        for start in range(0, len(data), block_size):
+            yield bytes(data[start:start + block_size])
+        return
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            while True:
+                block = f.read(block_size)
+                if not block:
+                    return
+                yield block
+    buffer = bytearray()
+    for piece in source:
+        buffer += piece
+        while len(buffer) >= block_size:
+            yield bytes(buffer[:block_size])
+            del buffer[:block_size]
+    if buffer:
+        yield bytes(buffer)
+
+
+def _known_size(source):
+    """Byte size of a path or bytes source; None for generators."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return len(source)
+    if isinstance(source, (str, os.PathLike)):
+        return os.path.getsize(source)
+    return None
+
+
+def _file_stamp(source):
+    """[size, mtime_ns] of a path source, used to reuse its hash from the manifest."""
+    if isinstance(source, (str, os.PathLike)):
+        stat = os.stat(source)
+        return [stat.st_size, stat.st_mtime_ns]
+    return None
+
+
+def content_md5(source, block_size=BLOCK_SIZE):
+    """(hex MD5, byte size) of a source, streamed block by block."""
+    digest, size = hashlib.md5(), 0
+    for block in iter_blocks(source, block_size):
+        digest.update(block)
+        size += len(block)
+    return digest.hexdigest(), size
+
+
+def _next_hashed(blocks, digest):
+    block = next(blocks, None)
+    if block is not None:
+        digest.update(block)
+    return block
+
+
+def _block_id(index, block):
+    # Same length for every block (Azure requires it); the hash makes resumes safe
+    return f"{index:06d}-{hashlib.sha256(block).hexdigest()[:24]}"
+
+
+def _write_at(path, offset, data):
+    with open(path, 'r+b') as f:
+        f.seek(offset)
+        f.write(data)
+
+
+class SyncManifest:
+    """Local record of the last upload per blob: content MD5, size and remote ETag."""
+
+    def __init__(self, path=SYNC_MANIFEST):
+        self.path = path
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.entries = json.load(f)
+
+    def get(self, container, name):
+        return self.entries.get(f"{container}/{name}")
+
+    def record(self, container, name, md5, size, etag, stamp=None):
+        self.entries[f"{container}/{name}"] = {'md5': md5, 'bytes': size, 'etag': etag, 'stamp': stamp}
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, 'w') as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+
+
+class TransferEngine:
+    """Uploads and downloads over one BlobStore with at most `concurrency` calls in flight.
+
+    Create it inside the event loop that uses it.
+    """
+
+    def __init__(self, store, concurrency=CONCURRENCY, block_size=BLOCK_SIZE):
+        self.store = store
+        self.block_size = block_size
+        self._pool = ThreadPoolExecutor(max_workers=concurrency)
+        self._slots = asyncio.Semaphore(concurrency)
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+
+    async def _call(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._pool, func, *args)
+
+    async def _stage(self, container, name, block_id, block):
+        try:
+            await self._call(self.store.stage_block, container, name, block_id, block)
+        finally:
+            self._slots.release()
+
+    async def upload(self, source, container, name):
+        """Upload a path, bytes or generator of bytes; returns a summary dict."""
+        size = _known_size(source)
+        blocks = iter_blocks(source, self.block_size)
+
+        if size is not None and size <= self.block_size:
+            # Small artifact: a single put, no staging round trips
+            async with self._slots:
+                data = await self._call(next, blocks, b'')
+                md5 = hashlib.md5(data).hexdigest()
+                await self._call(self.store.write, container, name, data, md5)
+            print(f"✅ Uploaded {container}/{name} ({len(data):,} bytes)")
+            return {'container': container, 'name': name, 'bytes': len(data), 'blocks': 1,
+                    'resumed': 0, 'md5': md5}
+
+        staged = await self._call(self.store.staged_blocks, container, name)
+        block_ids, tasks, resumed, total = [], [], 0, 0
+        digest = hashlib.md5()
+        try:
+            while True:
+                # Take a slot before reading, so read-ahead is bounded too
+                await self._slots.acquire()
+                try:
+                    block = await self._call(_next_hashed, blocks, digest)
+                except BaseException:
+                    self._slots.release()
+                    raise
+                if block is None:
+                    self._slots.release()
+                    break
+                block_id = _block_id(len(block_ids), block)
+                block_ids.append(block_id)
+                total += len(block)
+                if block_id in staged:
+                    resumed += 1
+                    self._slots.release()
+                    continue
+                tasks.append(asyncio.create_task(self._stage(container, name, block_id, block)))
+            await asyncio.gather(*tasks)
+        except BaseException:
+            # A failed read or block leaves no stage running (each returns its slot)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        md5 = digest.hexdigest()
+        async with self._slots:
+            await self._call(self.store.commit_blocks, container, name, block_ids, md5)
+        note = f", {resumed} resumed" if resumed else ""
+        print(f"✅ Uploaded {container}/{name} ({total:,} bytes, {len(block_ids)} blocks{note})")
+        return {'container': container, 'name': name, 'bytes': total,
+                'blocks': len(block_ids), 'resumed': resumed, 'md5': md5}
+
+    async def sync(self, source, container, name, manifest):
+        """Upload source only if it differs from the remote blob; returns a summary dict.
+
+        The remote copy counts as unchanged when its MD5 matches, or, for blobs
+        stored without an MD5, when its ETag is still the one recorded at our
+        last upload of the same content.
+        """
+        entry = manifest.get(container, name)
+        stamp = _file_stamp(source)
+        if entry and stamp and entry.get('stamp') == stamp:
+            md5, size = entry['md5'], entry['bytes']
+        else:
+            md5, size = await self._call(content_md5, source, self.block_size)
+        async with self._slots:
+            remote = await self._call(self.store.properties, container, name)
+
+        unchanged = remote is not None and remote['size'] == size and (
+            remote['md5'] == md5
+            or (remote['md5'] is None and entry is not None
+                and (entry['md5'], entry['etag']) == (md5, remote['etag'])))
+        if unchanged:
+            print(f"⏭️  Unchanged {container}/{name} ({size:,} bytes skipped)")
+            manifest.record(container, name, md5, size, remote['etag'], stamp)
+            return {'container': container, 'name': name, 'bytes': 0, 'saved': size, 'md5': md5}
+
+        result = await self.upload(source, container, name)
+        async with self._slots:
+            remote = await self._call(self.store.properties, container, name)
+        manifest.record(container, name, result['md5'], result['bytes'], remote and remote['etag'], stamp)
+        return {**result, 'saved': 0}
+
+    async def download(self, container, name, local_path):
+        """Download a blob to local_path with parallel ranged reads; returns a summary dict."""
+        async with self._slots:
+            remote = await self._call(self.store.properties, container, name)
+        if remote is None:
+            raise FileNotFoundError(f"{container}/{name} does not exist")
+        size, etag = remote['size'], remote['etag']
+        partial = local_path + '.partial'
+        state_path = partial + '.json'
+        state = {'size': size, 'etag': etag, 'block_size': self.block_size, 'done': []}
+        if os.path.exists(partial) and os.path.exists(state_path):
+            with open(state_path) as f:
+                previous = json.load(f)
+            # A blob overwritten since (new ETag, even at the same size) starts over
+            if (previous['size'], previous.get('etag'), previous['block_size']) == \
+                    (size, etag, self.block_size):
+                state = previous
+        done = set(state['done'])
+        if not done:
+            os.makedirs(os.path.dirname(local_path) or ".", exist_ok=True)
+            with open(partial, 'wb') as f:
+                f.truncate(size)
+
+        def save_state():
+            state['done'] = sorted(done)
+            with open(state_path, 'w') as f:
+                json.dump(state, f)
+
+        async def fetch(offset):
+            async with self._slots:
+                length = min(self.block_size, size - offset)
+                data = await self._call(self.store.read_range, container, name, offset, length)
+                await self._call(_write_at, partial, offset, data)
+            done.add(offset)
+            save_state()
+
+        offsets = [o for o in range(0, size, self.block_size) if o not in done]
+        resumed = len(done)
+        await asyncio.gather(*(fetch(o) for o in offsets))
+        os.replace(partial, local_path)
+        if os.path.exists(state_path):
+            os.remove(state_path)
+        note = f", {resumed} ranges resumed" if resumed else ""
+        print(f"✅ Downloaded {container}/{name} → {local_path} ({size:,} bytes{note})")
+        return {'container': container, 'name': name, 'bytes': size, 'resumed': resumed}
+
+    async def _many(self, transfer, jobs, targets):
+        results = await asyncio.gather(*(transfer(*job) for job in jobs), return_exceptions=True)
+        for (container, name), result in zip(targets, results):
+            if isinstance(result, BaseException):
+                print(f"❌ Transfer failed for {container}/{name}: {result}")
+        return results
+
+    async def upload_many(self, jobs):
+        """jobs: (source, container, name) tuples. Failures come back as exceptions."""
+        return await self._many(self.upload, jobs, [job[1:3] for job in jobs])
+
+    async def download_many(self, jobs):
+        """jobs: (container, name, local_path) tuples. Failures come back as exceptions."""
+        return await self._many(self.download, jobs, [job[0:2] for job in jobs])
+
+    async def sync_many(self, jobs, manifest):
+        """sync() every (source, container, name) job, then save the manifest and report savings."""
+        results = await self._many(lambda *job: self.sync(*job, manifest), jobs, [job[1:3] for job in jobs])
+        manifest.save()
+        done = [r for r in results if not isinstance(r, BaseException)]
+        sent = sum(r['bytes'] for r in done)
+        saved = sum(r['saved'] for r in done)
+        skipped = sum(1 for r in done if r['saved'])
+        print(f"📊 Sync: {len(done) - skipped} uploaded, {skipped} unchanged, "
+              f"{sent:,} bytes sent, {saved:,} bytes saved")
+        return results
+
+
+def _run(method, store, jobs, concurrency, block_size, *args):
+    async def main():
+        engine = TransferEngine(store, concurrency, block_size)
+        try:
+            return await getattr(engine, method)(jobs, *args)
+        finally:
+            engine.close()
+    return asyncio.run(main())
+
+
+def upload_all(store, jobs, concurrency=CONCURRENCY, block_size=BLOCK_SIZE):
+    """Upload (source, container, name) jobs concurrently from synchronous code."""
+    return _run('upload_many', store, list(jobs), concurrency, block_size)
+
+
+def download_all(store, jobs, concurrency=CONCURRENCY, block_size=BLOCK_SIZE):
+    """Download (container, name, local_path) jobs concurrently from synchronous code."""
+    return _run('download_many', store, list(jobs), concurrency, block_size)
+
+
+def sync_all(store, jobs, manifest_path=SYNC_MANIFEST, concurrency=CONCURRENCY, block_size=BLOCK_SIZE):
+    """Upload only the changed (source, container, name) jobs, from synchronous code."""
+    return _run('sync_many', store, list(jobs), concurrency, block_size, SyncManifest(manifest_path))
@@ -0,0 +1,104 @@
+"""
+TRIAL STORE - Persistent, resumable record of hyperparameter search trials
+Every scored (candidate, fold) fit is written to a local SQLite database,
+keyed by a fingerprint of the training data, the estimator configuration
+(including the sklearn and estimator library versions), the trial params and
+the fold. A rerun on the same data and libraries reads those scores back
+instead of refitting, so a killed search resumes where it stopped and
+repeated searches add to what is already known.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+import pandas as pd
+import sklearn
+
+TRIAL_STORE = "models/trials.sqlite"
+IGNORED_PARAMS = ('n_jobs', 'verbosity')  # do not change scores
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trials (
+    data TEXT NOT NULL,
+    estimator TEXT NOT NULL,
+    config TEXT NOT NULL,
+    params TEXT NOT NULL,
+    fold TEXT NOT NULL,
+    score REAL NOT NULL,
+    stopped_rounds REAL,
+    fit_seconds REAL,
+    recorded_at REAL,
+    PRIMARY KEY (data, estimator, config, params, fold)
+)
+"""
+
+
+def _canonical(value):
+    return json.dumps(value, sort_keys=True, default=repr)
+
+
+def data_fingerprint(X, y):
+    """SHA-256 of the training rows (index, columns, values) and target."""
+    h = hashlib.sha256()
+    h.update(_canonical([str(c) for c in X.columns]).encode())
+    h.update(pd.util.hash_pandas_object(X, index=True).to_numpy().tobytes())
+    h.update(pd.util.hash_pandas_object(y, index=True).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def library_versions(estimator):
+    """sklearn and estimator library versions: an upgrade can change every score."""
+    package = type(estimator).__module__.split('.')[0]
+    return {'sklearn_version': sklearn.__version__,
+            f'{package}_version': getattr(sys.modules.get(package), '__version__', None)}
+
+
+class TrialStore:
+    """SQLite table of fold scores. Use it from one thread (the search's dispatch loop)."""
+
+    def __init__(self, path=TRIAL_STORE):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(SCHEMA)
+        self.db.commit()
+
+    @staticmethod
+    def _key(data, estimator, params, fold, options):
+        config = {k: v for k, v in estimator.get_params().items() if k not in IGNORED_PARAMS}
+        config.update(library_versions(estimator))
+        return (data, type(estimator).__name__, _canonical({**config, **(options or {})}),
+                _canonical(params), fold)
+
+    def get(self, data, estimator, params, fold, options=None):
+        """(score, stopped_rounds) of a stored trial, or None."""
+        row = self.db.execute(
+            "SELECT score, stopped_rounds FROM trials WHERE data=? AND estimator=? AND config=? "
+            "AND params=? AND fold=?", self._key(data, estimator, params, fold, options)).fetchone()
+        if row is None:
+            return None
+        return row[0], float('nan') if row[1] is None else row[1]
+
+    def put(self, data, estimator, params, fold, score, stopped_rounds=None, fit_seconds=None,
+            options=None):
+        """Record one fold score; committed at once so a killed search keeps it."""
+        if stopped_rounds is not None:
+            # NaN (no early stopping) is stored as NULL
+            stopped_rounds = float(stopped_rounds) if stopped_rounds == stopped_rounds else None
+        self.db.execute("INSERT OR REPLACE INTO trials VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (*self._key(data, estimator, params, fold, options), float(score),
+                         stopped_rounds, fit_seconds, time.time()))
+        self.db.commit()
+
+    def count(self, data=None):
+        """Stored trials, optionally for one data fingerprint."""
+        if data is None:
+            return self.db.execute("SELECT COUNT(*) FROM trials").fetchone()[0]
+        return self.db.execute("SELECT COUNT(*) FROM trials WHERE data=?", (data,)).fetchone()[0]
+
+    def close(self):
+        self.db.close()
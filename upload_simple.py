@@ -1,86 +1,56 @@
 """
 Simple Azure Blob Upload - Using Account Key
+All artifacts go up concurrently through the transfer engine; unchanged
+ones are skipped (pass --force to re-send everything)
 """
 
 import os
-import subprocess
+import sys
+from azure_clients import get_blob_service
+from azure_config import STORAGE_ACCOUNT_NAME as STORAGE_ACCOUNT, get_storage_account_key
+from blob_storage import AzureBlobStore
+from transfer_engine import upload_all, sync_all
 
-STORAGE_ACCOUNT = "stengml707"
-RESOURCE_GROUP = "rg-engagement-ml"
+def get_blob_store(account_key):
+    """Blob store authenticated with the account key"""
+    service = get_blob_service(f"https://{STORAGE_ACCOUNT}.blob.core.windows.net", account_key)
+    return AzureBlobStore(service)
 
-def get_account_key():
-    """Get storage account key"""
-    print("🔑 Getting storage account key...")
-    result = subprocess.run(
-        [
-            "py", "-m", "azure.cli", "storage", "account", "keys", "list",
-            "--account-name", STORAGE_ACCOUNT,
-            "--resource-group", RESOURCE_GROUP,
-            "--output", "json"
-        ],
-        capture_output=True,
-        text=True
-    )
-    
-    if result.returncode != 0:
-        print(f"❌ Error: {result.stderr}")
-        return None
-    
-    import json
-    keys = json.loads(result.stdout)
-    return keys[0]['value'] if keys else None
-
-def upload_file(local_path, container, blob_name, account_key):
-    """Upload file using Azure CLI"""
-    print(f"📤 Uploading {local_path} to {container}/{blob_name}...")
-    
-    result = subprocess.run(
-        [
-            "py", "-m", "azure.cli", "storage", "blob", "upload",
-            "--account-name", STORAGE_ACCOUNT,
-            "--account-key", account_key,
-            "--container-name", container,
-            "--name", blob_name,
-            "--file", local_path,
-            "--overwrite"
-        ],
-        capture_output=True,
-        text=True
-    )
-    
-    if result.returncode == 0:
-        print(f"✅ Uploaded successfully!")
-        return True
-    else:
-        print(f"❌ Upload failed: {result.stderr}")
-        return False
-
-def main():
+def main(force=False):
     print("\n" + "="*70)
     print("AZURE BLOB STORAGE - DATA UPLOAD")
     print("="*70 + "\n")
     
     # Get account key
-    account_key = get_account_key()
+    print("🔑 Getting storage account key...")
+    account_key = get_storage_account_key()
     if not account_key:
         print("❌ Could not retrieve storage account key")
         return
     
     print("✅ Account key retrieved\n")
     
-    # Upload cleaned data
-    if os.path.exists("data/processed/cleaned_data.csv"):
-        upload_file("data/processed/cleaned_data.csv", "cleaned-data", "cleaned_data.csv", account_key)
-    else:
-        print("⚠️  Cleaned data not found")
-    
-    # Upload model
-    if os.path.exists("models/model.pkl"):
-        upload_file("models/model.pkl", "models", "model.pkl", account_key)
-    else:
-        print("⚠️  Model file not found")
+    artifacts = [
+        ("data/processed/cleaned_data.csv", "cleaned-data", "cleaned_data.csv", "Cleaned data"),
+        ("models/model.pkl", "models", "model.pkl", "Model file"),
+    ]
+    jobs = []
+    for local_path, container, blob_name, label in artifacts:
+        if os.path.exists(local_path):
+            print(f"📤 Uploading {local_path} to {container}/{blob_name}...")
+            jobs.append((local_path, container, blob_name))
+        else:
+            print(f"⚠️  {label} not found")
+    
+    store = get_blob_store(account_key)
+    results = upload_all(store, jobs) if force else sync_all(store, jobs)
+    failed = [f"{container}/{blob_name}" for (_, container, blob_name), result in zip(jobs, results)
+              if isinstance(result, BaseException)]
+    if failed:
+        print(f"\n❌ Upload failed: {', '.join(failed)}")
+        sys.exit(1)
     
     print("\n✅ Upload complete!")
 
 if __name__ == "__main__":
-    main()
+    main(force="--force" in sys.argv[1:])
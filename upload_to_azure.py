@@ -1,121 +1,89 @@
 """
 Cloud-Enabled Data Upload Script
-Upload raw data and cleaned data to Azure Blob Storage
+Upload raw data and cleaned data to Azure Blob Storage (or the STORAGE_URL backend)
+Transfers run concurrently in chunked blocks (see transfer_engine);
+artifacts whose content matches the remote copy are skipped
 """
 
 import pandas as pd
 import os
-from azure.storage.blob import BlobServiceClient
+import sys
 from azure.identity import InteractiveBrowserCredential
+from blob_storage import AzureBlobStore, is_azure_url, open_store
+from transfer_engine import upload_all, download_all, sync_all
 from azure_config import (
     STORAGE_ACCOUNT_NAME, 
+    STORAGE_URL,
     TENANT_ID,
     CONTAINER_RAW_DATA, 
     CONTAINER_CLEANED_DATA,
     get_storage_account_key
 )
 
-def upload_to_blob(local_path, container_name, blob_name):
-    """Upload file to Azure Blob Storage"""
-    print(f"📤 Uploading {local_path} to {container_name}/{blob_name}...")
+def get_blob_store(url=STORAGE_URL):
+    """Storage backend for url; Azure authenticates with the storage account key (looked up once)"""
+    if not is_azure_url(url):
+        return open_store(url)
     
-    # Get storage account key
     account_key = get_storage_account_key()
     
     if not account_key:
         print("❌ Could not retrieve storage account key")
-        return False
+        return None
+    
+    return open_store(url, credential=account_key)
+
+def upload_to_blob(local_path, container_name, blob_name, store=None, sync=True):
+    """Upload file to Azure Blob Storage"""
+    return upload_many_to_blob([(local_path, container_name, blob_name)], store, sync)[0]
+
+def upload_many_to_blob(jobs, store=None, sync=True):
+    """Upload (local_path, container, blob_name) jobs concurrently; sync skips unchanged ones"""
+    store = store or get_blob_store()
+    if store is None:
+        return [False] * len(jobs)
     
-    # Create connection string
-    connection_string = (
-        f"DefaultEndpointsProtocol=https;"
-        f"AccountName={STORAGE_ACCOUNT_NAME};"
-        f"AccountKey={account_key};"
-        f"EndpointSuffix=core.windows.net"
-    )
+    for local_path, container_name, blob_name in jobs:
+        print(f"📤 Uploading {local_path} to {container_name}/{blob_name}...")
     
-    try:
-        # Create blob service client
-        blob_service_client = BlobServiceClient.from_connection_string(connection_string)
-        
-        # Get blob client
-        blob_client = blob_service_client.get_blob_client(
-            container=container_name, 
-            blob=blob_name
-        )
-        
-        # Upload file
-        with open(local_path, "rb") as data:
-            blob_client.upload_blob(data, overwrite=True)
-        
-        print(f"✅ Uploaded successfully!")
-        print(f"   URL: https://{STORAGE_ACCOUNT_NAME}.blob.core.windows.net/{container_name}/{blob_name}")
-        return True
-        
-    except Exception as e:
-        print(f"❌ Upload failed: {e}")
-        return False
+    results = sync_all(store, jobs) if sync else upload_all(store, jobs)
+    if isinstance(store, AzureBlobStore):
+        account_url = store.service.url.rstrip('/')
+        for (_, container_name, blob_name), result in zip(jobs, results):
+            if not isinstance(result, BaseException):
+                print(f"   URL: {account_url}/{container_name}/{blob_name}")
+    return [not isinstance(result, BaseException) for result in results]
 
-def download_from_blob(container_name, blob_name, local_path):
-    """Download file from Azure Blob Storage"""
+def download_from_blob(container_name, blob_name, local_path, store=None):
+    """Download file from Azure Blob Storage (resumes an interrupted download)"""
     print(f"📥 Downloading {container_name}/{blob_name} to {local_path}...")
     
-    # Get storage account key
-    account_key = get_storage_account_key()
-    
-    if not account_key:
-        print("❌ Could not retrieve storage account key")
+    store = store or get_blob_store()
+    if store is None:
         return False
     
-    # Create connection string
-    connection_string = (
-        f"DefaultEndpointsProtocol=https;"
-        f"AccountName={STORAGE_ACCOUNT_NAME};"
-        f"AccountKey={account_key};"
-        f"EndpointSuffix=core.windows.net"
-    )
-    
-    try:
-        # Create blob service client
-        blob_service_client = BlobServiceClient.from_connection_string(connection_string)
-        
-        # Get blob client
-        blob_client = blob_service_client.get_blob_client(
-            container=container_name, 
-            blob=blob_name
-        )
-        
-        # Create directory if needed
-        os.makedirs(os.path.dirname(local_path), exist_ok=True)
-        
-        # Download file
-        with open(local_path, "wb") as download_file:
-            download_file.write(blob_client.download_blob().readall())
-        
-        print(f"✅ Downloaded successfully to {local_path}")
-        return True
-        
-    except Exception as e:
-        print(f"❌ Download failed: {e}")
-        return False
+    result = download_all(store, [(container_name, blob_name, local_path)])[0]
+    return not isinstance(result, BaseException)
 
-def main():
-    """Upload data files to Azure"""
+def main(force=False):
+    """Upload data files to Azure (force re-sends unchanged files)"""
     print("\n" + "="*70)
     print("AZURE BLOB STORAGE - DATA UPLOAD")
     print("="*70 + "\n")
     
+    jobs = []
+    
     # Upload raw dataset
     raw_data_path = "archive (1)/Social Media Engagement Dataset.csv"
     if os.path.exists(raw_data_path):
-        upload_to_blob(raw_data_path, CONTAINER_RAW_DATA, "Social_Media_Engagement_Dataset.csv")
+        jobs.append((raw_data_path, CONTAINER_RAW_DATA, "Social_Media_Engagement_Dataset.csv"))
     else:
         print(f"⚠️  Raw data file not found: {raw_data_path}")
     
     # Upload cleaned dataset
     cleaned_data_path = "data/processed/cleaned_data.csv"
     if os.path.exists(cleaned_data_path):
-        upload_to_blob(cleaned_data_path, CONTAINER_CLEANED_DATA, "cleaned_data.csv")
+        jobs.append((cleaned_data_path, CONTAINER_CLEANED_DATA, "cleaned_data.csv"))
     else:
         print(f"⚠️  Cleaned data file not found: {cleaned_data_path}")
     
@@ -123,11 +91,14 @@ def main():
     model_path = "models/model.pkl"
     if os.path.exists(model_path):
         from azure_config import CONTAINER_MODELS
-        upload_to_blob(model_path, CONTAINER_MODELS, "model.pkl")
+        jobs.append((model_path, CONTAINER_MODELS, "model.pkl"))
     else:
         print(f"⚠️  Model file not found: {model_path}")
     
+    # All files transfer concurrently, sharing one connection pool
+    upload_many_to_blob(jobs, sync=not force)
+    
     print("\n✅ Upload process complete!")
 
 if __name__ == "__main__":
-    main()
+    main(force="--force" in sys.argv[1:])